@@ -1,17 +1,34 @@
-from flask import Flask, render_template, request, jsonify
-from flask_socketio import SocketIO, emit
+# Eventlet must patch the stdlib before socket/threading/time are imported so
+# blocking model-server calls and sleeps yield to other green threads
+try:
+    import eventlet
+    eventlet.monkey_patch()
+    ASYNC_MODE = 'eventlet'
+except ImportError:
+    ASYNC_MODE = 'threading'
+
+from flask import Flask, Response, render_template, request, jsonify
+from flask_socketio import SocketIO, emit, join_room
+from cachetools import TTLCache
 import socket
 import json
+import queue
+import itertools
 import threading
-import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from datetime import datetime
 import logging
 import random
 import os
+import re
 
 # Import configuration
 from config import get_config, Config
 
+# Import model server wire protocol
+from model_protocol import send_message, send_raw, recv_message, loads as decode_json
+
 # Import attack categories
 from attack_categories import AttackSubcategory, AttackCategory, auto_detector
 
@@ -20,11 +37,20 @@ config = get_config()
 
 # Try to import packet capture
 try:
-    from packet_capture import PacketCapture
+    from packet_capture import PacketCapture, WIFI_NAME_RE
     PACKET_CAPTURE_AVAILABLE = True
 except ImportError:
     PACKET_CAPTURE_AVAILABLE = False
     PacketCapture = None
+    WIFI_NAME_RE = None
+
+# Try to import orjson for faster JSON responses
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
 
 # Configure logging based on mode
 logging.basicConfig(level=getattr(logging, config.LOG_LEVEL))
@@ -32,65 +58,233 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'cyber_sentinel_secret_2024')
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE,
+                    message_queue=config.SOCKETIO_MESSAGE_QUEUE)
 
-class SocketClient:
-    def __init__(self, host='localhost', port=9999):
+class SocketPool:
+    """Fixed-size pool of persistent connections to the model server"""
+
+    def __init__(self, host='localhost', port=9999, size=None, timeout=5, unix_path=None):
         self.host = host
         self.port = port
-        self.socket = None
-        self.connect()
-    
-    def connect(self):
-        """Connect to the model server"""
+        self.timeout = timeout
+        self.unix_path = unix_path
+        self.size = size or os.cpu_count() or 1
+        # Empty slots are held as None and reconnected on demand
+        self._sockets = queue.Queue()
+        self.initial_connections = 0
+        for _ in range(self.size):
+            sock = self._connect()
+            if sock is not None:
+                self.initial_connections += 1
+            self._sockets.put(sock)
+        if self.initial_connections:
+            logger.info(f"✅ Connected to model server ({self.initial_connections} pooled connections)")
+
+    def _use_unix_socket(self):
+        """Same-host model server with a Unix socket: skip the loopback TCP/IP stack"""
+        return (
+            hasattr(socket, 'AF_UNIX')
+            and self.unix_path
+            and self.host in ('localhost', '127.0.0.1')
+            and os.path.exists(self.unix_path)
+        )
+
+    def _connect(self):
+        """Open one connection to the model server, or return None on failure"""
+        if self._use_unix_socket():
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.settimeout(self.timeout)
+                sock.connect(self.unix_path)
+                return sock
+            except OSError as e:
+                sock.close()
+                logger.debug(f"Unix socket {self.unix_path} unavailable, falling back to TCP: {e}")
         try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.settimeout(5)  # 5 second timeout
-            self.socket.connect((self.host, self.port))
-            logger.info("✅ Connected to model server")
-            return True
-        except Exception as e:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            # Small request/response messages: don't let Nagle hold them back
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            return sock
+        except OSError as e:
             logger.error(f"❌ Failed to connect to model server: {e}")
-            self.socket = None
-            return False
-    
+            return None
+
+    def acquire(self):
+        """Take a connection from the pool (blocks while all are in use)"""
+        sock = self._sockets.get()
+        if sock is None:
+            sock = self._connect()
+        return sock
+
+    def release(self, sock):
+        """Return a healthy connection (or an empty slot) to the pool"""
+        self._sockets.put(sock)
+
+    def discard(self, sock):
+        """Close a faulty connection and free its slot for a fresh one"""
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._sockets.put(None)
+
+class SocketClient:
+    """Model server client shared by all request handlers.
+
+    Each call checks a connection out of the pool for one full request/response
+    exchange, so concurrent worker threads (or greenlets) never interleave
+    reads and writes on the same socket.
+    """
+
+    def __init__(self, host='localhost', port=9999, pool_size=None, unix_path=None):
+        self.host = host
+        self.port = port
+        self.pool = SocketPool(host, port, size=pool_size, unix_path=unix_path)
+        self.connected = self.pool.initial_connections > 0
+
     def send_network_data(self, network_data):
         """Send network data to model server and get response"""
-        if not self.socket:
-            if not self.connect():
+        return self._exchange(send_message, network_data)
+
+    def send_raw(self, body):
+        """Send an already JSON-encoded request body to the model server and get response"""
+        return self._exchange(send_raw, body)
+
+    def _exchange(self, send, request_data):
+        """Run one request/response round trip on a pooled connection"""
+        # A pooled connection may have been closed by the server while idle,
+        # so retry once on a fresh connection before giving up. The other pooled
+        # sockets are as old as this one, so the retry reconnects this slot
+        # instead of taking the next one from the queue.
+        sock = self.pool.acquire()
+        for attempt in range(2):
+            if sock is None:
+                self.pool.release(None)
+                self.connected = False
                 return {"error": "Cannot connect to model server"}
-        
-        try:
-            # Send data
-            json_data = json.dumps(network_data)
-            self.socket.send(json_data.encode('utf-8'))
-            
-            # Receive response
-            response = self.socket.recv(8192).decode('utf-8')  # Increased buffer size
-            return json.loads(response)
-            
-        except socket.timeout:
-            logger.error("Socket timeout")
-            self.socket = None
-            return {"error": "Model server timeout"}
-        except Exception as e:
-            logger.error(f"Error communicating with model server: {e}")
-            self.socket = None
-            return {"error": str(e)}
+
+            try:
+                send(sock, request_data)
+                response = recv_message(sock)
+            except socket.timeout:
+                logger.error("Socket timeout")
+                self.pool.discard(sock)
+                self.connected = False
+                return {"error": "Model server timeout"}
+            except ConnectionError as e:
+                if attempt == 0:
+                    try:
+                        sock.close()
+                    except OSError:
+                        pass
+                    sock = self.pool._connect()
+                    continue
+                self.pool.discard(sock)
+                self.connected = False
+                logger.error(f"Error communicating with model server: {e}")
+                return {"error": str(e)}
+            except Exception as e:
+                logger.error(f"Error communicating with model server: {e}")
+                self.pool.discard(sock)
+                self.connected = False
+                return {"error": str(e)}
+
+            self.pool.release(sock)
+            self.connected = True
+            return response
+
+    def send_batch(self, packets):
+        """Analyze several packets in one model server round trip; returns one result per packet"""
+        response = self.send_network_data({'command': 'batch', 'packets': packets})
+        results = response.get('results')
+        if not isinstance(results, list) or len(results) != len(packets):
+            error = response.get('error', 'Invalid batch response from model server')
+            return [{"error": error} for _ in packets]
+        return results
+
+def json_bytes(data):
+    """Serialize data to JSON bytes (orjson when available)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, default=str).encode('utf-8')
+
+def fast_jsonify(data, status=200):
+    """jsonify() replacement that serializes with orjson when available (hot endpoints)"""
+    if not ORJSON_AVAILABLE:
+        response = jsonify(data)
+        response.status_code = status
+        return response
+    return Response(
+        orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS),
+        status=status,
+        mimetype='application/json'
+    )
 
 # Global socket client
 socket_client = SocketClient(
     host=config.MODEL_SERVER_HOST, 
-    port=config.MODEL_SERVER_PORT
+    port=config.MODEL_SERVER_PORT,
+    unix_path=config.MODEL_SERVER_SOCKET
 )
 
-# Store detection history
-detection_history = []
+# Store detection history (bounded: oldest entries are dropped automatically)
+detection_history = deque(maxlen=1000)
 
 # Store threat detections separately for live display
-threat_detections = []
+threat_detections = deque(maxlen=500)
 threat_detections_lock = threading.Lock()
 
+# Serialized /detections payload, rebuilt only after threat_detections changes
+# (both guarded by threat_detections_lock)
+detections_version = 0
+_detections_cache = {'version': -1, 'bytes': b'[]', 'total': 0}
+
+# Running totals kept in step with detection_history/threat_detections (including
+# evictions) so /api/stats doesn't rescan both collections on every poll
+stats_counters = {
+    'threats_detected': 0,
+    'severity': Counter(),
+    'attack_type': Counter()
+}
+detection_history_lock = threading.Lock()
+
+def append_history(entry):
+    """Append an entry to detection_history and update the threat counter"""
+    with detection_history_lock:
+        if len(detection_history) == detection_history.maxlen:
+            if detection_history[0]['result'].get('threat_detected', False):
+                stats_counters['threats_detected'] -= 1
+        detection_history.append(entry)
+        if entry['result'].get('threat_detected', False):
+            stats_counters['threats_detected'] += 1
+
+def _record_history(pkt, result, feedback=False):
+    """Record a model server result for pkt in detection_history"""
+    entry = {
+        'timestamp': pkt.get('timestamp'),
+        'source_ip': pkt.get('srcip', 'unknown'),
+        'destination_ip': pkt.get('dstip', 'unknown'),
+        'protocol': pkt.get('protocol', 'unknown'),
+        'result': result
+    }
+    if feedback:
+        entry['feedback'] = True
+    append_history(entry)
+
+def _count_threat(detection, delta):
+    """Adjust severity/attack-type counters for a stored detection (call under threat_detections_lock)"""
+    # Severity is already uppercased by add_threat_detection
+    for counter, key in ((stats_counters['severity'], detection['severity']),
+                         (stats_counters['attack_type'], detection['attack_type'])):
+        counter[key] += delta
+        if counter[key] <= 0:
+            del counter[key]
+
+# Attack category metadata is static: build it once at import time
+ATTACK_CATEGORIES = AttackSubcategory.get_all_categories()
+
 # Global packet capture instance (will be set in main)
 packet_capture = None
 
@@ -118,14 +312,13 @@ def attack_categories():
 def api_attack_categories():
     """Get all available attack categories and subcategories"""
     try:
-        categories = AttackSubcategory.get_all_categories()
         enabled_attacks = auto_detector.get_enabled_attacks()
         
-        return jsonify({
+        return fast_jsonify({
             'success': True,
-            'categories': categories,
+            'categories': ATTACK_CATEGORIES,
             'enabled_attacks': enabled_attacks,
-            'total_categories': len(categories),
+            'total_categories': len(ATTACK_CATEGORIES),
             'total_enabled': len(enabled_attacks)
         })
     except Exception as e:
@@ -278,24 +471,14 @@ def api_detect():
         
         # Emit new_detection event for real-time updates
         if threat_detection:
-            socketio.emit('new_detection', threat_detection)
+            socketio.emit('new_detection', threat_detection, to='detections')
             logger.info("📡 Emitted new_detection event via SocketIO")
         
         # Store in history
         if 'error' not in result:
-            detection_history.append({
-                'timestamp': network_data['timestamp'],
-                'source_ip': network_data.get('srcip', 'unknown'),
-                'destination_ip': network_data.get('dstip', 'unknown'),
-                'protocol': network_data.get('protocol', 'unknown'),
-                'result': result
-            })
-            
-            # Keep only last 1000 entries
-            if len(detection_history) > 1000:
-                detection_history.pop(0)
+            _record_history(network_data, result)
         
-        return jsonify(result)
+        return fast_jsonify(result)
         
     except Exception as e:
         logger.error(f"API error: {e}")
@@ -304,7 +487,7 @@ def api_detect():
 @app.route('/api/stats')
 def api_stats():
     """Get system statistics"""
-    threats_detected = sum(1 for d in detection_history if d['result'].get('threat_detected', False))
+    threats_detected = stats_counters['threats_detected']
     
     # Get packet capture stats if available
     capture_stats = {}
@@ -317,37 +500,41 @@ def api_stats():
         except Exception as e:
             logger.debug(f"Error getting capture stats: {e}")
     
-    # Count threat detections from global list
+    # Read the running threat counters (maintained by add_threat_detection)
     with threat_detections_lock:
         live_threats_count = len(threat_detections)
         
         # Count by severity
-        critical_threats = sum(1 for t in threat_detections if t.get('severity', '').upper() == 'CRITICAL')
-        high_threats = sum(1 for t in threat_detections if t.get('severity', '').upper() == 'HIGH')
-        medium_threats = sum(1 for t in threat_detections if t.get('severity', '').upper() == 'MEDIUM')
-        low_threats = sum(1 for t in threat_detections if t.get('severity', '').upper() == 'LOW')
+        severity_counts = stats_counters['severity']
+        critical_threats = severity_counts['CRITICAL']
+        high_threats = severity_counts['HIGH']
+        medium_threats = severity_counts['MEDIUM']
+        low_threats = severity_counts['LOW']
         
         # Count by attack type
-        attack_types = {}
-        for t in threat_detections:
-            attack_type = t.get('attack_type', 'Unknown')
-            attack_types[attack_type] = attack_types.get(attack_type, 0) + 1
+        attack_types = dict(stats_counters['attack_type'])
+    
+    # Last 10 entries, walking from the tail; the lock keeps concurrent appends
+    # from mutating the deque mid-iteration
+    with detection_history_lock:
+        total_detections = len(detection_history)
+        recent_activity = list(itertools.islice(reversed(detection_history), 10))[::-1]
     
     # AI Model status
     model_status = {
-        'connected': socket_client.socket is not None,
-        'model_server_running': socket_client.socket is not None,
-        'models_loaded': 1 if socket_client.socket else 0,
+        'connected': socket_client.connected,
+        'model_server_running': socket_client.connected,
+        'models_loaded': 1 if socket_client.connected else 0,
         'total_models': 1,  # CyberSentinel model
-        'model_names': ['CyberSentinel CICIDS2017'] if socket_client.socket else []
+        'model_names': ['CyberSentinel CICIDS2017'] if socket_client.connected else []
     }
     
     stats = {
-        'total_detections': len(detection_history),
+        'total_detections': total_detections,
         'threats_detected': threats_detected,
-        'normal_traffic': len(detection_history) - threats_detected,
-        'system_status': 'operational' if socket_client.socket else 'disconnected',
-        'recent_activity': detection_history[-10:] if detection_history else [],
+        'normal_traffic': total_detections - threats_detected,
+        'system_status': 'operational' if socket_client.connected else 'disconnected',
+        'recent_activity': recent_activity,
         'live_threats': {
             'total': live_threats_count,
             'critical': critical_threats,
@@ -371,7 +558,7 @@ def api_stats():
             'active_limits': len(threat_rate_limiter)
         }
     }
-    return jsonify(stats)
+    return fast_jsonify(stats)
 
 @app.route('/api/history')
 def api_history():
@@ -382,9 +569,14 @@ def api_history():
     start_idx = (page - 1) * per_page
     end_idx = start_idx + per_page
     
-    history_page = detection_history[::-1][start_idx:end_idx]  # Reverse for newest first
+    # Index the newest-first page directly instead of reversing the whole history
+    with detection_history_lock:
+        n = len(detection_history)
+        real_start = max(0, n - end_idx)
+        real_end = min(n, n - start_idx) if start_idx >= 0 else 0
+        history_page = [detection_history[i] for i in range(real_end - 1, real_start - 1, -1)]
     
-    return jsonify({
+    return fast_jsonify({
         'history': history_page,
         'total_pages': (len(detection_history) + per_page - 1) // per_page,
         'current_page': page,
@@ -395,14 +587,23 @@ def api_history():
 def get_detections():
     """Get all threat detections as JSON"""
     with threat_detections_lock:
-        # Return detections in reverse order (newest first)
-        detections = threat_detections[::-1]
+        if _detections_cache['version'] != detections_version:
+            # Return detections in reverse order (newest first)
+            detections = list(reversed(threat_detections))
+            _detections_cache['bytes'] = json_bytes(detections)
+            _detections_cache['total'] = len(detections)
+            _detections_cache['version'] = detections_version
+        detections_bytes = _detections_cache['bytes']
+        total = _detections_cache['total']
     
-    return jsonify({
-        'detections': detections,
-        'total': len(detections),
-        'timestamp': datetime.now().isoformat()
-    })
+    # Splice the cached list into the envelope; only the timestamp is fresh per poll
+    body = b''.join([
+        b'{"detections":', detections_bytes,
+        b',"total":', str(total).encode('ascii'),
+        b',"timestamp":', json_bytes(datetime.now().isoformat()),
+        b'}'
+    ])
+    return Response(body, mimetype='application/json')
 
 @app.route('/api/feedback', methods=['POST'])
 def api_feedback():
@@ -419,66 +620,46 @@ def api_feedback():
 
         # record feedback in history if accepted
         if 'error' not in result:
-            detection_history.append({
-                'timestamp': payload['timestamp'],
-                'source_ip': payload.get('srcip', 'unknown'),
-                'destination_ip': payload.get('dstip', 'unknown'),
-                'protocol': payload.get('protocol', 'unknown'),
-                'result': result,
-                'feedback': True
-            })
-            if len(detection_history) > 1000:
-                detection_history.pop(0)
+            _record_history(payload, result, feedback=True)
 
         return jsonify(result)
     except Exception as e:
         logger.error(f"Feedback API error: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/test_port_scan', methods=['POST'])
-def api_test_port_scan():
-    """TEST/SIMULATION ONLY: Simulate a port scan attack for demonstration purposes"""
+def run_port_scan_simulation():
+    """Run the simulated port scan in the background and emit the summary as 'port_scan_complete'"""
     try:
-        logger.warning("🧪 TEST MODE: Starting port scan simulation (NOT REAL THREAT)")
-        
         # SIMULATED port scanning activity - these are fake IPs for testing
         attacker_ip = "TEST.192.168.1.100"  # Clearly marked as test IP
         target_ip = "TEST.10.0.0.50"        # Clearly marked as test IP
         
-        results = []
+        # Simulate scanning 20 ports rapidly (one timestamp for the whole burst)
+        now_iso = datetime.now().isoformat()
+        scan_packets = [{
+            'srcip': attacker_ip,
+            'dstip': target_ip,
+            'src_port': 54321,
+            'dst_port': port,
+            'protocol': 'tcp',
+            'flags': 2,  # SYN flag only (stealth scan)
+            'packet_size': 60,
+            'duration': 0.01,
+            'timestamp': now_iso
+        } for port in range(20, 40)]
+        
+        # Send all packets to the model server in a single round trip
+        results = socket_client.send_batch(scan_packets)
         threats_detected = 0
         
-        # Simulate scanning 20 ports rapidly
-        for port in range(20, 40):
-            scan_packet = {
-                'srcip': attacker_ip,
-                'dstip': target_ip,
-                'src_port': 54321,
-                'dst_port': port,
-                'protocol': 'tcp',
-                'flags': 2,  # SYN flag only (stealth scan)
-                'packet_size': 60,
-                'duration': 0.01,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            # Send to model server
-            result = socket_client.send_network_data(scan_packet)
-            results.append(result)
-            
+        for scan_packet, result in zip(scan_packets, results):
             # Check if threat detected
             if result.get('threat_detected'):
                 threats_detected += 1
             
             # Store in history
             if 'error' not in result:
-                detection_history.append({
-                    'timestamp': scan_packet['timestamp'],
-                    'source_ip': attacker_ip,
-                    'destination_ip': target_ip,
-                    'protocol': 'tcp',
-                    'result': result
-                })
+                _record_history(scan_packet, result)
             
             # Add to threat detections if threat detected
             threat_detection = add_threat_detection(scan_packet, result)
@@ -492,16 +673,13 @@ def api_test_port_scan():
             
             # Also emit new_detection event for real-time updates
             if threat_detection:
-                socketio.emit('new_detection', threat_detection)
-            
-            # Small delay to simulate realistic scanning
-            time.sleep(0.1)
+                socketio.emit('new_detection', threat_detection, to='detections')
         
         final_result = results[-1] if results else {"error": "No results"}
         
         logger.info(f"🧪 TEST COMPLETED: {len(results)} SIMULATED packets sent, {threats_detected} threats detected")
         
-        return jsonify({
+        socketio.emit('port_scan_complete', {
             'success': True,
             'message': 'SIMULATION COMPLETED - This was a test, not a real attack',
             'packets_sent': len(results),
@@ -515,6 +693,31 @@ def api_test_port_scan():
         logger.error(f"Port scan test error: {e}")
         import traceback
         traceback.print_exc()
+        socketio.emit('port_scan_complete', {
+            'success': False,
+            'error': str(e),
+            'message': 'Port scan test failed',
+            'test_mode': True
+        })
+
+@app.route('/api/test_port_scan', methods=['POST'])
+def api_test_port_scan():
+    """TEST/SIMULATION ONLY: Simulate a port scan attack for demonstration purposes
+    
+    Returns immediately; packets and the final summary are streamed via SocketIO.
+    """
+    try:
+        logger.warning("🧪 TEST MODE: Starting port scan simulation (NOT REAL THREAT)")
+        socketio.start_background_task(run_port_scan_simulation)
+        
+        return jsonify({
+            'success': True,
+            'message': 'SIMULATION STARTED - This is a test, not a real attack',
+            'test_mode': True  # Clearly indicate this is a test
+        })
+        
+    except Exception as e:
+        logger.error(f"Port scan test error: {e}")
         return jsonify({
             'success': False,
             'error': str(e),
@@ -538,13 +741,16 @@ def api_port_scan_stats():
         return jsonify({"error": str(e)}), 500
 
 # Rate limiting for threat detections (configurable)
-threat_rate_limiter = {}
+# Keys expire on their own after THREAT_RATE_LIMIT_SECONDS, so no per-call cleanup scan
 THREAT_RATE_LIMIT_SECONDS = config.THREAT_RATE_LIMIT_SECONDS
+THREAT_RATE_LIMIT_MAX_KEYS = 10000
+threat_rate_limiter = TTLCache(maxsize=THREAT_RATE_LIMIT_MAX_KEYS, ttl=THREAT_RATE_LIMIT_SECONDS)
+threat_rate_limiter_lock = threading.Lock()
 
 @app.route('/api/rate_limit', methods=['GET', 'POST'])
 def api_rate_limit():
     """Get or set rate limiting configuration"""
-    global THREAT_RATE_LIMIT_SECONDS
+    global THREAT_RATE_LIMIT_SECONDS, threat_rate_limiter
     
     if request.method == 'POST':
         try:
@@ -552,8 +758,9 @@ def api_rate_limit():
             new_limit = int(data.get('seconds', THREAT_RATE_LIMIT_SECONDS))
             if 1 <= new_limit <= 60:  # Allow 1-60 seconds
                 THREAT_RATE_LIMIT_SECONDS = new_limit
-                # Clear existing rate limiter to apply new settings
-                threat_rate_limiter.clear()
+                # Replace the rate limiter to apply new settings (TTL is fixed per cache)
+                with threat_rate_limiter_lock:
+                    threat_rate_limiter = TTLCache(maxsize=THREAT_RATE_LIMIT_MAX_KEYS, ttl=new_limit)
                 return jsonify({
                     'success': True,
                     'message': f'Rate limit updated to {new_limit} seconds',
@@ -580,6 +787,8 @@ def add_threat_detection(packet_data, result):
     All detections are stored in the global threat_detections list which is
     accessible via the /detections endpoint for the Flask UI.
     """
+    global detections_version
+    
     if not result:
         logger.warning("add_threat_detection called with None result")
         return None
@@ -587,30 +796,24 @@ def add_threat_detection(packet_data, result):
     if result.get('threat_detected'):
         # Create rate limiting key
         rate_key = f"{result.get('attack_type', 'Unknown')}_{packet_data.get('srcip', 'unknown')}"
-        current_time = time.time()
         
-        # Check rate limiting
-        if rate_key in threat_rate_limiter:
-            if current_time - threat_rate_limiter[rate_key] < THREAT_RATE_LIMIT_SECONDS:
+        # Check rate limiting (entries expire after THREAT_RATE_LIMIT_SECONDS)
+        with threat_rate_limiter_lock:
+            if rate_key in threat_rate_limiter:
                 # Skip this detection due to rate limiting
                 logger.debug(f"⏭️ Detection rate-limited: {rate_key}")
                 return None
-        
-        # Update rate limiter
-        threat_rate_limiter[rate_key] = current_time
-        
-        # Clean old entries from rate limiter (keep it from growing indefinitely)
-        keys_to_remove = [k for k, v in threat_rate_limiter.items() if current_time - v > THREAT_RATE_LIMIT_SECONDS * 2]
-        for k in keys_to_remove:
-            del threat_rate_limiter[k]
+            
+            # Update rate limiter
+            threat_rate_limiter[rate_key] = True
         
         detection = {
-            'timestamp': packet_data.get('timestamp', datetime.now().isoformat()),
+            'timestamp': packet_data.get('timestamp') or datetime.now().isoformat(),
             'attack_type': result.get('attack_type', 'Unknown'),
             'source_ip': packet_data.get('srcip', 'unknown'),
             'destination_ip': packet_data.get('dstip', 'unknown'),
             'confidence': result.get('confidence', 0.0),
-            'severity': result.get('severity', 'UNKNOWN'),
+            'severity': str(result.get('severity', 'UNKNOWN')).upper(),  # normalized once for counting
             'protocol': packet_data.get('protocol', 'unknown'),
             'src_port': packet_data.get('src_port', 0),
             'dst_port': packet_data.get('dst_port', 0),
@@ -620,11 +823,13 @@ def add_threat_detection(packet_data, result):
         
         # CRITICAL: Store detection in global list (this is what the Flask UI reads from)
         with threat_detections_lock:
+            # deque(maxlen=500) drops the oldest detection once full
+            if len(threat_detections) == threat_detections.maxlen:
+                _count_threat(threat_detections[0], -1)
             threat_detections.append(detection)
+            _count_threat(detection, 1)
+            detections_version += 1
             total_count = len(threat_detections)
-            # Keep only last 500 detections (reduced from 1000)
-            if len(threat_detections) > 500:
-                threat_detections.pop(0)
         
         logger.info(f"💾 Detection stored in threat_detections list (total stored: {total_count})")
         
@@ -642,7 +847,7 @@ def add_threat_detection(packet_data, result):
                 'total_threats': len(threat_detections),
                 'new_threat': detection,
                 'timestamp': detection['timestamp']
-            })
+            }, to='stats')
         except Exception as e:
             logger.debug(f"Error emitting stats update: {e}")
         
@@ -651,12 +856,27 @@ def add_threat_detection(packet_data, result):
         logger.debug(f"No threat detected in result: {result.get('attack_type', 'Normal traffic')}")
     return None
 
+# Rooms a client may join for live detection/stat pushes
+LIVE_UPDATE_ROOMS = frozenset({'detections', 'stats'})
+
 @socketio.on('connect')
 def handle_connect():
     """Handle WebSocket connection"""
     logger.info('Client connected via WebSocket')
     emit('status', {'message': 'Connected to Cyber Sentinel', 'status': 'connected'})
 
+@socketio.on('join')
+def handle_join(data):
+    """Subscribe the client to live update rooms ('detections', 'stats')
+
+    new_detection and stats_update are only sent to subscribers, so pages
+    that never render them are skipped during fan-out.
+    """
+    rooms = (data or {}).get('rooms', [])
+    for room in rooms:
+        if room in LIVE_UPDATE_ROOMS:
+            join_room(room)
+
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle WebSocket disconnection"""
@@ -668,39 +888,53 @@ def handle_realtime_detection(data):
     try:
         # Send to model server
         result = socket_client.send_network_data(data)
-        
-        # Add timestamp if not present
-        if 'timestamp' not in data:
-            data['timestamp'] = datetime.now().isoformat()
-        
-        # Add to threat detections if threat detected
-        threat_detection = add_threat_detection(data, result)
-        
-        # Emit to all connected clients (FIXED - removed broadcast)
-        emit('threat_update', {
-            'timestamp': data.get('timestamp', datetime.now().isoformat()),
-            'data': data,
-            'result': result
-        })
-        
-        # Also emit new_detection event for real-time updates
-        if threat_detection:
-            socketio.emit('new_detection', threat_detection)
-        
-        # Store in history
-        if 'error' not in result:
-            detection_history.append({
-                'timestamp': data.get('timestamp', datetime.now().isoformat()),
-                'source_ip': data.get('srcip', 'unknown'),
-                'destination_ip': data.get('dstip', 'unknown'),
-                'protocol': data.get('protocol', 'unknown'),
-                'result': result
-            })
+        _publish_realtime_result(data, result)
             
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
         emit('error', {'message': str(e)})
 
+@socketio.on('realtime_detection_raw')
+def handle_realtime_detection_raw(body):
+    """Handle real-time detection sent as a JSON-encoded binary payload
+
+    The bytes are forwarded to the model server unchanged (no re-encoding)
+    and decoded once for local bookkeeping.
+    """
+    try:
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        result = socket_client.send_raw(bytes(body))
+        _publish_realtime_result(decode_json(body), result)
+            
+    except Exception as e:
+        logger.error(f"WebSocket error: {e}")
+        emit('error', {'message': str(e)})
+
+def _publish_realtime_result(data, result):
+    """Store and broadcast the model server result for a real-time packet"""
+    # Add timestamp if not present
+    if 'timestamp' not in data:
+        data['timestamp'] = datetime.now().isoformat()
+    
+    # Add to threat detections if threat detected
+    threat_detection = add_threat_detection(data, result)
+    
+    # Emit to all connected clients (FIXED - removed broadcast)
+    emit('threat_update', {
+        'timestamp': data['timestamp'],
+        'data': data,
+        'result': result
+    })
+    
+    # Also emit new_detection event for real-time updates
+    if threat_detection:
+        socketio.emit('new_detection', threat_detection, to='detections')
+    
+    # Store in history
+    if 'error' not in result:
+        _record_history(data, result)
+
 @socketio.on('label_feedback')
 def handle_label_feedback(data):
     """Receive labeled sample via WebSocket and forward to model server"""
@@ -713,33 +947,20 @@ def handle_label_feedback(data):
 
         # store in history if accepted
         if 'error' not in result:
-            detection_history.append({
-                'timestamp': data['timestamp'],
-                'source_ip': data.get('srcip', 'unknown'),
-                'destination_ip': data.get('dstip', 'unknown'),
-                'protocol': data.get('protocol', 'unknown'),
-                'result': result,
-                'feedback': True
-            })
-            if len(detection_history) > 1000:
-                detection_history.pop(0)
+            _record_history(data, result, feedback=True)
 
     except Exception as e:
         logger.error(f"WebSocket feedback error: {e}")
         emit('error', {'message': str(e)})
 
-def generate_sample_traffic():
-    """Generate sample network traffic for demonstration (CONFIGURABLE)"""
-    # Check if sample traffic is enabled in configuration
-    if not config.SAMPLE_TRAFFIC_ENABLED:
-        return  # Disabled in production mode
-    
+SAMPLE_TRAFFIC_POOL_SIZE = 256
+
+def build_sample_traffic_pool(size=SAMPLE_TRAFFIC_POOL_SIZE):
+    """Pre-generate randomized sample packets so the traffic loop only rotates through them"""
     protocols = ['tcp', 'udp', 'icmp']
-    attack_types = ['normal', 'dos', 'exploit', 'reconnaissance']
+    pool = []
     
-    while True:
-        time.sleep(3)  # Generate every 3 seconds
-        
+    for _ in range(size):
         # Create realistic sample data
         sample_data = {
             'srcip': f"192.168.1.{random.randint(1, 255)}",
@@ -758,149 +979,214 @@ def generate_sample_traffic():
             sample_data['duration'] = random.uniform(5.0, 10.0)
             sample_data['flags'] = random.choice([2, 4, 8])  # Suspicious flags
         
+        pool.append(sample_data)
+    return pool
+
+# Built once at import, only when sample traffic is enabled (test mode)
+SAMPLE_TRAFFIC_POOL = build_sample_traffic_pool() if config.SAMPLE_TRAFFIC_ENABLED else []
+
+def generate_sample_traffic():
+    """Generate sample network traffic for demonstration (CONFIGURABLE)"""
+    # Check if sample traffic is enabled in configuration
+    if not config.SAMPLE_TRAFFIC_ENABLED:
+        return  # Disabled in production mode
+    
+    for sample_data in itertools.cycle(SAMPLE_TRAFFIC_POOL):
+        socketio.sleep(3)  # Generate every 3 seconds
+        
         # Send via WebSocket
         socketio.emit('sample_traffic', sample_data)
 
-if __name__ == '__main__':
+def get_run_options():
+    """Extra socketio.run() options for the active async mode"""
+    # allow_unsafe_werkzeug only applies to the Werkzeug dev server; eventlet's
+    # WSGI server rejects unknown keyword arguments
+    if ASYNC_MODE == 'threading':
+        return {'allow_unsafe_werkzeug': True}
+    # Eventlet's per-request access log is only useful while developing
+    return {'log_output': config.DEBUG_MODE}
+
+# Interface probes each open a pcap handle and sniff briefly, so run them in parallel
+INTERFACE_PROBE_WORKERS = 8
+INTERFACE_PROBE_TIMEOUT = 10.0  # seconds for the whole probe round
+MAX_INTERFACE_PROBES = 5
+
+# Virtual, tunnel and loopback adapters never carry the traffic we want to monitor
+IGNORED_INTERFACE_RE = re.compile(
+    r'loopback|pseudo|hyper-?v|vmware|vethernet|docker|isatap|teredo', re.IGNORECASE
+)
+
+def _interface_priority(iface):
+    """Sort key: Wi-Fi first, then wired Ethernet, then everything else"""
+    if WIFI_NAME_RE.search(iface):
+        return 0
+    return 1 if 'ethernet' in iface.lower() else 2
+
+def _probe_interface(iface):
+    """Test one capture interface on a throwaway PacketCapture
+
+    Returns (success, needs_fallback, wifi_name).
+    """
+    probe = PacketCapture(
+        model_server_host=config.MODEL_SERVER_HOST,
+        model_server_port=config.MODEL_SERVER_PORT,
+        interface=iface,
+        filter_str="tcp or udp",
+        max_packets_per_second=1,  # Very low rate for testing
+        socketio=None,
+        threat_callback=None
+    )
+    success, needs_fallback = probe._test_interface()
+    return success, needs_fallback, getattr(probe, '_wifi_name', None)
+
+def _probe_interfaces(candidates):
+    """Probe candidate interfaces concurrently and pick the highest-priority one that works
+
+    Candidates are in priority order. Returns (iface, needs_fallback, wifi_name),
+    or None if no candidate works within INTERFACE_PROBE_TIMEOUT.
+    """
+    if not candidates:
+        return None
+    
+    pool = ThreadPoolExecutor(max_workers=min(INTERFACE_PROBE_WORKERS, len(candidates)))
+    futures = {pool.submit(_probe_interface, iface): index for index, iface in enumerate(candidates)}
+    results = {}
+    try:
+        for future in as_completed(futures, timeout=INTERFACE_PROBE_TIMEOUT):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                logger.warning("⚠️ Interface %s probe failed: %s", candidates[index], e)
+                results[index] = (False, False, None)
+            
+            # Adopt the first working candidate once every higher-priority probe has finished
+            for rank, iface in enumerate(candidates):
+                if rank not in results:
+                    break
+                success, needs_fallback, wifi_name = results[rank]
+                if success:
+                    return iface, needs_fallback, wifi_name
+    except FuturesTimeoutError:
+        logger.warning("⚠️ Interface probing timed out")
+        # Fall back to the best candidate that did finish in time
+        for rank in sorted(results):
+            success, needs_fallback, wifi_name = results[rank]
+            if success:
+                return candidates[rank], needs_fallback, wifi_name
+    finally:
+        # Don't wait for slower probes once a winner is known
+        for future in futures:
+            future.cancel()
+        pool.shutdown(wait=False)
+    return None
+
+def _select_interface():
+    """Choose the capture interface: returns (interface, fallback)
+
+    interface is None to capture on all interfaces. fallback is True when that is
+    because no specific interface could be found or probed successfully.
+    """
+    available_interfaces = PacketCapture()._get_available_interfaces()
+    if not available_interfaces:
+        logger.error("❌ No network interfaces available")
+        return None, True
+    logger.debug("Available network interfaces: %s", available_interfaces)
+    
+    # Drop duplicates and virtual adapters, then probe only the best few
+    # (stable sort keeps enumeration order within each priority)
+    available_interfaces = [
+        iface for iface in dict.fromkeys(available_interfaces)
+        if not IGNORED_INTERFACE_RE.search(iface)
+    ]
+    if not available_interfaces:
+        logger.warning("⚠️ Only virtual or loopback interfaces found")
+        return None, True
+    available_interfaces.sort(key=_interface_priority)
+    available_interfaces = available_interfaces[:MAX_INTERFACE_PROBES]
+    if WIFI_NAME_RE.search(available_interfaces[0]):
+        logger.info("📶 Selected Wi-Fi interface for monitoring: %s", available_interfaces[0])
+    else:
+        logger.info("🎯 Selected interface for monitoring: %s", available_interfaces[0])
+    
+    # Probe all candidates concurrently, in priority order
+    probe = _probe_interfaces(available_interfaces)
+    if probe is None:
+        logger.warning("⚠️ No working network interfaces found")
+        return None, True
+    
+    iface, needs_fallback, wifi_name = probe
+    if needs_fallback:
+        # Interface works only via the capture-all fallback
+        logger.info("⚠️ Interface %s needs fallback, will use all interfaces", iface)
+        return None, False
+    if wifi_name:
+        # The probe found a usable Wi-Fi friendly name for the GUID
+        logger.info("📶 Using Wi-Fi friendly name: %s", wifi_name)
+        return wifi_name, False
+    logger.info("✅ Interface %s works!", iface)
+    return iface, False
+
+def start_background_services():
+    """Start the sample traffic generator and real-time packet capture
+
+    Called once per process: from __main__ for the built-in server, or from
+    a single worker's post_worker_init hook under gunicorn (gunicorn.conf.py).
+    """
+    global packet_capture
+    
     # Display current mode information
     mode_info = config.get_mode_info()
     logger.info("🔧 Cyber Sentinel Configuration:")
-    logger.info(f"   Mode: {mode_info['mode']}")
-    logger.info(f"   Real Threat Detection: {mode_info['real_threat_detection']}")
-    logger.info(f"   Packet Capture: {'Enabled' if mode_info['packet_capture_active'] else 'Disabled'}")
-    logger.info(f"   Sample Traffic: {'Enabled' if mode_info['sample_traffic_active'] else 'Disabled'}")
-    logger.info(f"   Debug Mode: {mode_info['debug_mode']}")
+    logger.info("   Mode: %s", mode_info['mode'])
+    logger.info("   Real Threat Detection: %s", mode_info['real_threat_detection'])
+    logger.info("   Packet Capture: %s", 'Enabled' if mode_info['packet_capture_active'] else 'Disabled')
+    logger.info("   Sample Traffic: %s", 'Enabled' if mode_info['sample_traffic_active'] else 'Disabled')
+    logger.info("   Debug Mode: %s", mode_info['debug_mode'])
+    logger.info("   Async Mode: %s", ASYNC_MODE)
     
     # Start sample traffic generator if enabled
     if config.SAMPLE_TRAFFIC_ENABLED:
         logger.info("🧪 Starting sample traffic generator (TEST MODE)")
-        traffic_thread = threading.Thread(target=generate_sample_traffic, daemon=True)
-        traffic_thread.start()
+        socketio.start_background_task(generate_sample_traffic)
     else:
         logger.info("🚫 Sample traffic disabled (PRODUCTION MODE)")
     
     # Start real-time packet capture if available and enabled
     if config.PACKET_CAPTURE_ENABLED and PACKET_CAPTURE_AVAILABLE:
         try:
-            # Get available network interfaces for real monitoring
-            packet_capture_instance = PacketCapture()
-            available_interfaces = packet_capture_instance._get_available_interfaces()
+            monitor_interface, fallback = _select_interface()
+            if fallback:
+                logger.info("💡 Trying fallback: capture on all interfaces (iface=None)")
             
-            if available_interfaces:
-                logger.info(f"🌐 Available network interfaces: {available_interfaces}")
-                
-                # Use first available interface for real monitoring
-                monitor_interface = None
-                interface_found = False
-                
-                if available_interfaces:
-                    # Prioritize Wi-Fi interface (should be first if found)
-                    monitor_interface = available_interfaces[0]
-                    # Check if first interface is Wi-Fi
-                    iface_lower = monitor_interface.lower()
-                    is_wifi = 'wi-fi' in iface_lower or 'wifi' in iface_lower or 'wireless' in iface_lower
-                    if is_wifi:
-                        logger.info(f"📶 Selected Wi-Fi interface for monitoring: {monitor_interface}")
-                    else:
-                        logger.info(f"🎯 Selected interface for monitoring: {monitor_interface}")
-                        # Try to find Wi-Fi in the list
-                        for iface in available_interfaces:
-                            iface_lower = iface.lower()
-                            if 'wi-fi' in iface_lower or 'wifi' in iface_lower or 'wireless' in iface_lower:
-                                monitor_interface = iface
-                                logger.info(f"📶 Found and selected Wi-Fi interface: {monitor_interface}")
-                                break
-                    
-                    # Try to start packet capture and test if it works
-                    test_capture = PacketCapture(
-                        model_server_host=config.MODEL_SERVER_HOST,
-                        model_server_port=config.MODEL_SERVER_PORT,
-                        interface=monitor_interface,
-                        filter_str="tcp or udp",
-                        max_packets_per_second=1,  # Very low rate for testing
-                        socketio=None,
-                        threat_callback=None
-                    )
-                    
-                    # Quick test to see if interface works
-                    logger.info(f"🧪 Testing interface {monitor_interface}...")
-                    test_success, needs_fallback = test_capture._test_interface()
-                    if not test_success:
-                        logger.warning(f"⚠️ Interface {monitor_interface} failed test, trying next...")
-                        # Try next interface
-                        for i, iface in enumerate(available_interfaces[1:], 1):
-                            logger.info(f"🧪 Testing interface {iface}...")
-                            test_capture.interface = iface
-                            test_success, needs_fallback = test_capture._test_interface()
-                            if test_success:
-                                monitor_interface = iface if not needs_fallback else None
-                                logger.info(f"✅ Interface {iface} works!" if not needs_fallback else f"✅ Interface {iface} needs fallback, using all interfaces")
-                                interface_found = True
-                                break
-                        else:
-                            logger.error("❌ No working interfaces found")
-                            packet_capture = None
-                            interface_found = False
-                    else:
-                        # If test succeeded but needs fallback, set interface to None
-                        if needs_fallback:
-                            logger.info(f"⚠️ Interface {monitor_interface} needs fallback, will use all interfaces")
-                            monitor_interface = None
-                        # Check if test_capture found a Wi-Fi friendly name
-                        elif hasattr(test_capture, '_wifi_name') and test_capture._wifi_name:
-                            monitor_interface = test_capture._wifi_name
-                            logger.info(f"📶 Using Wi-Fi friendly name: {monitor_interface}")
-                        interface_found = True
+            # monitor_interface is None when capturing on all interfaces
+            packet_capture = PacketCapture(
+                model_server_host=config.MODEL_SERVER_HOST,
+                model_server_port=config.MODEL_SERVER_PORT,
+                interface=monitor_interface,  # Use specific interface for real monitoring
+                filter_str="tcp or udp",  # Focus on TCP/UDP for threat detection
+                max_packets_per_second=config.MAX_PACKETS_PER_SECOND,  # Use config value
+                socketio=socketio,  # Pass SocketIO instance for real-time updates
+                threat_callback=add_threat_detection  # Callback to add threats to global list
+            )
+            if packet_capture.start_capture():
+                if fallback:
+                    logger.info("✅ Packet capture started on all interfaces (fallback mode)")
+                    logger.info("📡 Monitoring network traffic for threats...")
                 else:
-                    logger.error("❌ No network interfaces available")
-                    packet_capture = None
-                    interface_found = False
-                
-                # Only proceed if we found a working interface (monitor_interface can be None for fallback)
-                if interface_found:
-                    packet_capture = PacketCapture(
-                        model_server_host=config.MODEL_SERVER_HOST,
-                        model_server_port=config.MODEL_SERVER_PORT,
-                        interface=monitor_interface,  # Use specific interface for real monitoring
-                        filter_str="tcp or udp",  # Focus on TCP/UDP for threat detection
-                        max_packets_per_second=config.MAX_PACKETS_PER_SECOND,  # Use config value
-                        socketio=socketio,  # Pass SocketIO instance for real-time updates
-                        threat_callback=add_threat_detection  # Callback to add threats to global list
-                    )
-                    if packet_capture.start_capture():
-                        logger.info("✅ Real-time packet capture started on production interface")
-                        logger.info("📡 Monitoring REAL network traffic for threats...")
-                        logger.info("🔍 All detections now represent actual network activity")
-                    else:
-                        logger.warning("⚠️ Failed to start packet capture (may need admin privileges)")
-                        logger.warning("💡 Run as Administrator on Windows for real network monitoring")
-                        packet_capture = None
+                    logger.info("✅ Real-time packet capture started on production interface")
+                    logger.info("📡 Monitoring REAL network traffic for threats...")
+                    logger.info("🔍 All detections now represent actual network activity")
+            else:
+                if fallback:
+                    logger.warning("⚠️ Fallback capture also failed")
                 else:
-                    logger.warning("⚠️ No working network interfaces found")
-                    logger.info("💡 Trying fallback: capture on all interfaces (iface=None)")
-                    # Try fallback: capture on all interfaces
-                    try:
-                        packet_capture = PacketCapture(
-                            model_server_host=config.MODEL_SERVER_HOST,
-                            model_server_port=config.MODEL_SERVER_PORT,
-                            interface=None,  # Use None to capture on all interfaces
-                            filter_str="tcp or udp",
-                            max_packets_per_second=config.MAX_PACKETS_PER_SECOND,
-                            socketio=socketio,
-                            threat_callback=add_threat_detection
-                        )
-                        if packet_capture.start_capture():
-                            logger.info("✅ Packet capture started on all interfaces (fallback mode)")
-                            logger.info("📡 Monitoring network traffic for threats...")
-                        else:
-                            logger.warning("⚠️ Fallback capture also failed")
-                            packet_capture = None
-                    except Exception as e:
-                        logger.error(f"❌ Fallback capture failed: {e}")
-                        packet_capture = None
+                    logger.warning("⚠️ Failed to start packet capture (may need admin privileges)")
+                    logger.warning("💡 Run as Administrator on Windows for real network monitoring")
+                packet_capture = None
                 
         except Exception as e:
-            logger.error(f"❌ Error starting packet capture: {e}")
+            logger.error("❌ Error starting packet capture: %s", e)
             logger.error("💡 For real network monitoring:")
             logger.error("   1. Run as Administrator/root")
             logger.error("   2. Install Npcap on Windows: https://npcap.com/")
@@ -913,13 +1199,19 @@ if __name__ == '__main__':
             logger.warning("⚠️ Packet capture not available. Install Scapy: pip install scapy")
             logger.warning("On Windows, also install Npcap: https://npcap.com/")
     
+if __name__ == '__main__':
+    # In debug mode the reloader re-runs this module in a child process
+    # (WERKZEUG_RUN_MAIN set); only that child serves, so only it captures
+    if not config.DEBUG_MODE or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_services()
+    
     logger.info("🚀 Starting Cyber Sentinel Web Application...")
-    logger.info(f"📊 Dashboard: http://{config.WEB_HOST}:{config.WEB_PORT}")
-    logger.info(f"🔍 Real-time Detection: http://{config.WEB_HOST}:{config.WEB_PORT}/detection")
-    logger.info(f"📈 History: http://{config.WEB_HOST}:{config.WEB_PORT}/history")
+    logger.info("📊 Dashboard: http://%s:%s", config.WEB_HOST, config.WEB_PORT)
+    logger.info("🔍 Real-time Detection: http://%s:%s/detection", config.WEB_HOST, config.WEB_PORT)
+    logger.info("📈 History: http://%s:%s/history", config.WEB_HOST, config.WEB_PORT)
     
     try:
-        socketio.run(app, host=config.WEB_HOST, port=config.WEB_PORT, debug=config.DEBUG_MODE, allow_unsafe_werkzeug=True)
+        socketio.run(app, host=config.WEB_HOST, port=config.WEB_PORT, debug=config.DEBUG_MODE, **get_run_options())
     except KeyboardInterrupt:
         logger.info("Shutting down...")
         if packet_capture:
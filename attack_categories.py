@@ -4,10 +4,79 @@ Attack Categories and Automatic Detection System
 Defines attack types, their signatures, and automatic detection rules
 """
 
+from collections import deque
 from enum import Enum
-from typing import Dict, List, Any, Optional
+from functools import lru_cache
+from typing import Callable, Dict, List, Any, Optional, Tuple, Union
+import operator
 import re
 import ipaddress
+import threading
+import time
+
+# NumPy is only needed for batch analysis; single-packet analysis works without it
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Compiled batch scoring kernel, used when Numba is installed
+try:
+    from detector_kernel import score_packets, NUMBA_AVAILABLE as KERNEL_AVAILABLE
+except ImportError:
+    KERNEL_AVAILABLE = False
+
+# TCP header flag bits used by "tcp_flags" detection rules
+TCP_FLAG_BITS = {
+    "SYN": 0x02,
+    "ACK": 0x10,
+    "FIN": 0x01,
+    "RST": 0x04,
+    "PSH": 0x08,
+    "URG": 0x20,
+    "ECE": 0x40,
+    "CWR": 0x80,
+    "NULL": 0x00
+}
+
+# IANA protocol numbers for "protocol" rules; packets may carry these as "proto_id"
+PROTOCOL_IDS = {"TCP": 6, "UDP": 17, "ICMP": 1}
+
+# Bits of the matched-rule mask built while scoring, in matched_rules order
+MATCH_TCP_FLAGS = 1 << 0
+MATCH_CONNECTION_RATE = 1 << 1
+MATCH_PROTOCOL = 1 << 2
+MATCH_DST_PORT = 1 << 3
+MATCH_UNIQUE_PORTS = 1 << 4
+_MATCH_RULE_NAMES = ("tcp_flags", "connection_rate", "protocol", "dst_port", "unique_ports_pattern")
+# matched-rule mask -> rule names, so names are only materialized for detections
+MATCHED_RULES_BY_MASK = tuple(
+    tuple(name for bit, name in enumerate(_MATCH_RULE_NAMES) if mask & (1 << bit))
+    for mask in range(1 << len(_MATCH_RULE_NAMES))
+)
+
+# Rate rules such as "> 10/second" or ">= 100/minute"
+RATE_RULE_RE = re.compile(r'([<>]=?)\s*(\d+)\s*/?\s*(second|minute)?', re.IGNORECASE)
+RATE_WINDOWS = {"second": 1.0, "minute": 60.0}
+RATE_COMPARATORS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+MAX_RATE_TRACKERS = 10000  # (attack, source) pairs tracked before stale ones are pruned
+
+def parse_rate_rule(rule: str) -> Optional[Tuple[str, int, float]]:
+    """Parse a rate rule like "> 10/second" into (operator, count, window_seconds)"""
+    match = RATE_RULE_RE.search(rule)
+    if not match:
+        return None
+    op, count, unit = match.groups()
+    return op, int(count), RATE_WINDOWS[(unit or "second").lower()]
+
+# Rule weights in integer hundredths of confidence (0.30, 0.25, ...), so scoring
+# adds small ints instead of allocating a float per step
+WEIGHT_TCP_FLAGS = 30
+WEIGHT_CONNECTION_RATE = 25
+WEIGHT_PROTOCOL = 20
+WEIGHT_DST_PORT = 15
+WEIGHT_UNIQUE_PORTS = 10
 
 class AttackCategory(Enum):
     """Enumeration of attack categories"""
@@ -294,55 +363,138 @@ class AttackSubcategory:
         }
     }
     
-    @classmethod
-    def get_all_categories(cls) -> List[Dict[str, Any]]:
-        """Get all attack categories with their subcategories"""
-        categories = []
-        for category, subcategories in cls.CATEGORIES.items():
-            category_info = {
-                "category": category.value,
-                "subcategories": []
-            }
-            for subcat_key, subcat_info in subcategories.items():
-                category_info["subcategories"].append({
+    # Flat subcategory_id -> (category, subcategory) index, built once from CATEGORIES
+    _SUBCAT_INDEX = {
+        subcat_id: (category, subcat)
+        for category, subcategories in CATEGORIES.items()
+        for subcat_id, subcat in subcategories.items()
+    }
+    
+    # Parsed "connection_rate" rules: subcategory_id -> (operator, count, window_seconds),
+    # or None when the rule is not numeric
+    _RATE_RULES = {
+        subcat_id: parse_rate_rule(subcat["detection_rules"]["connection_rate"])
+        for subcat_id, (_, subcat) in _SUBCAT_INDEX.items()
+        if "connection_rate" in subcat["detection_rules"]
+    }
+    
+    # Public category listing returned by get_all_categories, built once from CATEGORIES
+    _ALL_CATEGORIES = tuple(
+        {
+            "category": category.value,
+            "subcategories": tuple(
+                {
                     "id": subcat_key,
                     "name": subcat_info["name"],
                     "description": subcat_info["description"],
                     "severity": subcat_info["severity"],
                     "auto_response": subcat_info["auto_response"]
-                })
-            categories.append(category_info)
-        return categories
+                }
+                for subcat_key, subcat_info in subcategories.items()
+            )
+        }
+        for category, subcategories in CATEGORIES.items()
+    )
+    
+    @classmethod
+    def get_all_categories(cls) -> List[Dict[str, Any]]:
+        """Get all attack categories with their subcategories
+        
+        The outer list is a fresh copy; the category dicts are shared and read-only.
+        """
+        return list(cls._ALL_CATEGORIES)
     
     @classmethod
     def get_subcategory_info(cls, subcategory_id: str) -> Optional[Dict[str, Any]]:
         """Get detailed information about a specific subcategory"""
-        for category, subcategories in cls.CATEGORIES.items():
-            if subcategory_id in subcategories:
-                info = subcategories[subcategory_id].copy()
-                info["category"] = category.value
-                info["id"] = subcategory_id
-                return info
-        return None
+        # IDs can come straight from API requests; a non-string (e.g. a list) is
+        # unknown rather than an unhashable-key error from the cache below
+        if not isinstance(subcategory_id, str):
+            return None
+        return cls._subcategory_info(subcategory_id)
+    
+    # CATEGORIES is static, so the lookup is memoized; treat results as read-only
+    @classmethod
+    @lru_cache(maxsize=256)  # bounded: IDs can come straight from API requests
+    def _subcategory_info(cls, subcategory_id: str) -> Optional[Dict[str, Any]]:
+        entry = cls._SUBCAT_INDEX.get(subcategory_id)
+        if entry is None:
+            return None
+        category, subcat = entry
+        info = subcat.copy()
+        info["category"] = category.value
+        info["id"] = subcategory_id
+        return info
     
     @classmethod
     def get_detection_rules(cls, subcategory_id: str) -> Optional[Dict[str, Any]]:
         """Get detection rules for a specific attack type"""
-        for category, subcategories in cls.CATEGORIES.items():
-            if subcategory_id in subcategories:
-                return subcategories[subcategory_id]["detection_rules"]
-        return None
+        if not isinstance(subcategory_id, str):
+            return None
+        entry = cls._SUBCAT_INDEX.get(subcategory_id)
+        return entry[1]["detection_rules"] if entry else None
+
+class Packet:
+    """Fields the automatic detector reads from a packet
+    
+    analyze_packet accepts either a Packet or a packet dict (as sent by the API and
+    WebSocket handlers); dicts are converted once so each enabled attack reads
+    slot attributes instead of repeating dict lookups. Producers that feed the
+    detector directly should build Packet objects.
+    """
+    __slots__ = ("flags", "proto_id", "protocol", "dst_port", "src_ip", "ts", "pkt_len")
+    
+    def __init__(self, flags: int = 0, proto_id: Optional[int] = None, protocol: str = "",
+                 dst_port: int = 0, src_ip: Optional[str] = None, ts: Optional[str] = None,
+                 pkt_len: int = 0):
+        self.flags = flags
+        self.proto_id = proto_id
+        self.protocol = protocol
+        self.dst_port = dst_port
+        self.src_ip = src_ip
+        self.ts = ts
+        self.pkt_len = pkt_len
+    
+    @classmethod
+    def from_dict(cls, packet_data: Dict[str, Any]) -> "Packet":
+        """Build a Packet from the packet dict format used by PacketCapture and the API"""
+        return cls(
+            flags=packet_data.get("flags", 0),
+            proto_id=packet_data.get("proto_id"),
+            protocol=packet_data.get("protocol", ""),
+            dst_port=packet_data.get("dst_port", 0),
+            src_ip=packet_data.get("srcip"),
+            ts=packet_data.get("timestamp"),
+            pkt_len=packet_data.get("packet_size", 0)
+        )
 
 class AutomaticDetector:
     """Automatic attack detection based on selected categories"""
     
+    __slots__ = (
+        "enabled_attacks", "detection_rules", "response_actions", "flag_masks",
+        "thresholds", "info", "protocol_ids", "port_sets", "rate_rules",
+        "_rate_events", "_rate_lock", "_kernel_tables", "_scorers"
+    )
+    
     def __init__(self):
         self.enabled_attacks = set()
         self.detection_rules = {}
         self.response_actions = {}
+        self.flag_masks = {}  # attack id -> (mask, exact) compiled from "tcp_flags"
+        self.thresholds = {}  # attack id -> confidence threshold in hundredths
+        self.info = {}  # attack id -> subcategory info, so packets never look it up
+        self.protocol_ids = {}  # attack id -> IANA number of the "protocol" rule (None if unmapped)
+        self.port_sets = {}  # attack id -> frozenset of "dst_port" rule ports
+        self.rate_rules = {}  # attack id -> parsed "connection_rate" rule, or a fixed bool
+        self._rate_events = {}  # (attack id, source ip) -> recent packet times
+        self._rate_lock = threading.Lock()
+        self._kernel_tables = None  # per-attack arrays for detector_kernel; False if unsupported
+        self._scorers = {}  # attack id -> generated packet scorer, see _compile_scorer
     
     def enable_attack_detection(self, subcategory_ids: List[str]):
         """Enable automatic detection for specific attack types"""
+        self._kernel_tables = None
         for subcat_id in subcategory_ids:
             rules = AttackSubcategory.get_detection_rules(subcat_id)
             info = AttackSubcategory.get_subcategory_info(subcat_id)
@@ -351,133 +503,367 @@ class AutomaticDetector:
                 self.enabled_attacks.add(subcat_id)
                 self.detection_rules[subcat_id] = rules
                 self.response_actions[subcat_id] = info["auto_response"]
+                self.info[subcat_id] = info
+                self.thresholds[subcat_id] = round(rules.get("confidence_threshold", 0.7) * 100)
+                if "tcp_flags" in rules:
+                    self.flag_masks[subcat_id] = self._compile_tcp_flags(rules["tcp_flags"])
+                if "protocol" in rules:
+                    self.protocol_ids[subcat_id] = PROTOCOL_IDS.get(rules["protocol"].upper())
+                if "dst_port" in rules:
+                    ports = rules["dst_port"]
+                    self.port_sets[subcat_id] = frozenset(ports if isinstance(ports, list) else (ports,))
+                if "connection_rate" in rules:
+                    parsed = AttackSubcategory._RATE_RULES.get(subcat_id)
+                    # Non-numeric rules keep the old qualitative reading ("high")
+                    self.rate_rules[subcat_id] = parsed or "high" in rules["connection_rate"].lower()
+                self._scorers[subcat_id] = self._compile_scorer(subcat_id)
     
     def disable_attack_detection(self, subcategory_ids: List[str]):
         """Disable detection for specific attack types"""
+        self._kernel_tables = None
         for subcat_id in subcategory_ids:
             self.enabled_attacks.discard(subcat_id)
             self.detection_rules.pop(subcat_id, None)
             self.response_actions.pop(subcat_id, None)
+            self.flag_masks.pop(subcat_id, None)
+            self.thresholds.pop(subcat_id, None)
+            self.info.pop(subcat_id, None)
+            self.protocol_ids.pop(subcat_id, None)
+            self.port_sets.pop(subcat_id, None)
+            self.rate_rules.pop(subcat_id, None)
+            self._scorers.pop(subcat_id, None)
+        with self._rate_lock:
+            for key in [key for key in self._rate_events if key[0] in subcategory_ids]:
+                del self._rate_events[key]
     
-    def analyze_packet(self, packet_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def analyze_packet(self, packet_data: Union[Packet, Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Analyze packet for enabled attack types"""
         detections = []
+        packet = packet_data if isinstance(packet_data, Packet) else Packet.from_dict(packet_data)
         
         for attack_type in self.enabled_attacks:
             if attack_type in self.detection_rules:
-                detection = self._check_attack_rules(packet_data, attack_type)
+                detection = self._check_attack_rules(packet, attack_type)
                 if detection:
                     detections.append(detection)
         
         return detections
     
-    def _check_attack_rules(self, packet_data: Dict[str, Any], attack_type: str) -> Optional[Dict[str, Any]]:
-        """Check if packet matches attack detection rules"""
-        rules = self.detection_rules[attack_type]
-        info = AttackSubcategory.get_subcategory_info(attack_type)
+    # Below this size the per-batch array setup costs more than it saves
+    MIN_VECTORIZED_BATCH = 8
+    
+    def analyze_batch(self, packets: List[Union[Packet, Dict[str, Any]]]) -> List[List[Dict[str, Any]]]:
+        """Analyze several packets at once; returns the analyze_packet result for each packet
         
-        if not info:
-            return None
+        Rule checks run in the compiled detector_kernel when Numba is installed, and
+        as NumPy array expressions across the whole batch otherwise. Falls back to
+        per-packet analysis for small batches, without NumPy, or when packet fields
+        are not numeric.
+        """
+        if not NUMPY_AVAILABLE or len(packets) < self.MIN_VECTORIZED_BATCH:
+            return [self.analyze_packet(packet) for packet in packets]
         
-        confidence = 0.0
-        matched_rules = []
+        packets = [p if isinstance(p, Packet) else Packet.from_dict(p) for p in packets]
+        count = len(packets)
+        try:
+            flags = np.fromiter((p.flags for p in packets), dtype=np.int64, count=count)
+            dst_ports = np.fromiter((p.dst_port for p in packets), dtype=np.int64, count=count)
+            packet_proto_ids = np.fromiter(
+                (-1 if p.proto_id is None else p.proto_id for p in packets), dtype=np.int64, count=count
+            )
+        except (TypeError, ValueError, OverflowError):
+            return [self.analyze_packet(packet) for packet in packets]
         
-        # Check TCP flags
-        if "tcp_flags" in rules:
-            packet_flags = packet_data.get("flags", 0)
-            required_flags = rules["tcp_flags"]
+        if KERNEL_AVAILABLE:
+            tables = self._get_kernel_tables()
+            if tables is not None:
+                return self._analyze_batch_kernel(packets, tables, flags, dst_ports, packet_proto_ids)
+        
+        # Protocol names become small ints so each rule compares integers
+        proto_names = {}
+        protocols = np.fromiter(
+            (proto_names.setdefault(p.protocol.upper(), len(proto_names)) for p in packets),
+            dtype=np.int64, count=count
+        )
+        
+        results = [[] for _ in range(count)]
+        for attack_type in self.enabled_attacks:
+            if attack_type not in self.detection_rules:
+                continue
+            rules = self.detection_rules[attack_type]
+            info = self.info[attack_type]
+            
+            # Same integer weights as _check_attack_rules
+            confidence = np.zeros(count, dtype=np.int64)
+            checks = []
             
-            if self._check_tcp_flags(packet_flags, required_flags):
-                confidence += 0.3
-                matched_rules.append("tcp_flags")
+            if "tcp_flags" in rules:
+                mask, exact = self.flag_masks[attack_type]
+                hit = (flags == mask) if exact else (flags & mask) == mask
+                confidence += np.where(hit, WEIGHT_TCP_FLAGS, 0)
+                checks.append(("tcp_flags", hit))
+            
+            if "connection_rate" in rules:
+                # Rate tracking is stateful, so packets are counted in arrival order
+                hit = np.fromiter(
+                    (self._check_connection_rate(packet, attack_type) for packet in packets),
+                    dtype=bool, count=count
+                )
+                confidence += np.where(hit, WEIGHT_CONNECTION_RATE, 0)
+                checks.append(("connection_rate", hit))
+            
+            if "protocol" in rules:
+                # Same rule as the scalar path: IANA number when both sides have one
+                hit = protocols == proto_names.get(rules["protocol"].upper(), -1)
+                rule_proto_id = self.protocol_ids[attack_type]
+                if rule_proto_id is not None:
+                    hit = np.where(packet_proto_ids >= 0, packet_proto_ids == rule_proto_id, hit)
+                confidence += np.where(hit, WEIGHT_PROTOCOL, 0)
+                checks.append(("protocol", hit))
+            
+            if "dst_port" in rules:
+                hit = np.isin(dst_ports, list(self.port_sets[attack_type]))
+                confidence += np.where(hit, WEIGHT_DST_PORT, 0)
+                checks.append(("dst_port", hit))
+            
+            if "unique_ports" in rules:
+                confidence += WEIGHT_UNIQUE_PORTS
+                checks.append(("unique_ports_pattern", None))
+            
+            for index in np.flatnonzero(confidence >= self.thresholds[attack_type]):
+                results[index].append({
+                    "attack_type": attack_type,
+                    "attack_name": info["name"],
+                    "category": info["category"],
+                    "confidence": int(confidence[index]) / 100,
+                    "severity": info["severity"],
+                    "matched_rules": [name for name, hit in checks if hit is None or hit[index]],
+                    "auto_response": self.response_actions.get(attack_type),
+                    "description": info["description"]
+                })
         
-        # Check connection rate
-        if "connection_rate" in rules:
-            rate_rule = rules["connection_rate"]
-            if self._check_connection_rate(packet_data, rate_rule):
-                confidence += 0.25
-                matched_rules.append("connection_rate")
+        return results
+    
+    def _get_kernel_tables(self) -> Optional[tuple]:
+        """Per-attack rule arrays for detector_kernel, rebuilt after enable/disable"""
+        if self._kernel_tables is None:
+            self._kernel_tables = self._build_kernel_tables() or False
+        return self._kernel_tables or None
+    
+    def _build_kernel_tables(self) -> Optional[tuple]:
+        """Compile enabled rules to arrays, or None if a rule needs the NumPy path"""
+        attack_order = tuple(a for a in self.enabled_attacks if a in self.detection_rules)
+        if not attack_order:
+            return None
         
-        # Check protocol
-        if "protocol" in rules:
-            if packet_data.get("protocol", "").upper() == rules["protocol"].upper():
-                confidence += 0.2
-                matched_rules.append("protocol")
+        n_attacks = len(attack_order)
+        max_ports = max((len(self.port_sets.get(a, ())) for a in attack_order), default=0) or 1
+        rule_bits = np.zeros(n_attacks, dtype=np.int64)
+        flag_masks = np.zeros(n_attacks, dtype=np.int64)
+        flag_exact = np.zeros(n_attacks, dtype=np.bool_)
+        rule_proto_ids = np.full(n_attacks, -1, dtype=np.int64)
+        port_table = np.zeros((n_attacks, max_ports), dtype=np.int64)
+        port_counts = np.zeros(n_attacks, dtype=np.int64)
+        thresholds = np.zeros(n_attacks, dtype=np.int64)
         
-        # Check destination ports
-        if "dst_port" in rules:
-            dst_port = packet_data.get("dst_port", 0)
-            allowed_ports = rules["dst_port"]
-            if isinstance(allowed_ports, list):
-                if dst_port in allowed_ports:
-                    confidence += 0.15
-                    matched_rules.append("dst_port")
-            elif dst_port == allowed_ports:
-                confidence += 0.15
-                matched_rules.append("dst_port")
+        for a, attack_type in enumerate(attack_order):
+            rules = self.detection_rules[attack_type]
+            bits = 0
+            if "tcp_flags" in rules:
+                bits |= MATCH_TCP_FLAGS
+                flag_masks[a], flag_exact[a] = self.flag_masks[attack_type]
+            if "connection_rate" in rules:
+                bits |= MATCH_CONNECTION_RATE
+            if "protocol" in rules:
+                # Protocols outside PROTOCOL_IDS are only matched by name
+                if self.protocol_ids[attack_type] is None:
+                    return None
+                bits |= MATCH_PROTOCOL
+                rule_proto_ids[a] = self.protocol_ids[attack_type]
+            if "dst_port" in rules:
+                ports = self.port_sets[attack_type]
+                if not all(isinstance(port, int) for port in ports):
+                    return None
+                bits |= MATCH_DST_PORT
+                port_table[a, :len(ports)] = list(ports)
+                port_counts[a] = len(ports)
+            if "unique_ports" in rules:
+                bits |= MATCH_UNIQUE_PORTS
+            rule_bits[a] = bits
+            thresholds[a] = self.thresholds[attack_type]
         
-        # Check unique ports
-        if "unique_ports" in rules:
-            # This would need to be tracked over time
-            # For now, we'll add a small confidence boost
-            confidence += 0.1
-            matched_rules.append("unique_ports_pattern")
+        weights = np.array([WEIGHT_TCP_FLAGS, WEIGHT_CONNECTION_RATE, WEIGHT_PROTOCOL,
+                            WEIGHT_DST_PORT, WEIGHT_UNIQUE_PORTS], dtype=np.int64)
+        return (attack_order, rule_bits, flag_masks, flag_exact, rule_proto_ids,
+                port_table, port_counts, thresholds, weights)
+    
+    def _analyze_batch_kernel(self, packets: List[Packet], tables: tuple, flags, dst_ports,
+                              packet_proto_ids) -> List[List[Dict[str, Any]]]:
+        """analyze_batch scored by the compiled detector_kernel"""
+        (attack_order, rule_bits, flag_masks, flag_exact, rule_proto_ids,
+         port_table, port_counts, thresholds, weights) = tables
+        count = len(packets)
         
-        # Check confidence threshold
-        threshold = rules.get("confidence_threshold", 0.7)
+        # Packets without proto_id are matched by protocol name through the same IANA table
+        name_proto_ids = np.fromiter(
+            (PROTOCOL_IDS.get(p.protocol.upper(), -1) for p in packets), dtype=np.int64, count=count
+        )
+        proto_ids = np.where(packet_proto_ids >= 0, packet_proto_ids, name_proto_ids)
+        
+        # Rate tracking is stateful Python, so it runs before the kernel in arrival order
+        rate_hits = np.zeros((len(attack_order), count), dtype=np.bool_)
+        for a, attack_type in enumerate(attack_order):
+            if rule_bits[a] & MATCH_CONNECTION_RATE:
+                rate_hits[a] = [self._check_connection_rate(p, attack_type) for p in packets]
         
-        if confidence >= threshold:
+        confidence, matched = score_packets(
+            flags, proto_ids, dst_ports, rate_hits, rule_bits, flag_masks, flag_exact,
+            rule_proto_ids, port_table, port_counts, weights
+        )
+        
+        results = [[] for _ in range(count)]
+        # nonzero walks attack-major, so each packet's detections keep enabled-attack order
+        for a, index in zip(*np.nonzero(confidence >= thresholds[:, None])):
+            attack_type = attack_order[a]
+            info = self.info[attack_type]
+            results[index].append({
+                "attack_type": attack_type,
+                "attack_name": info["name"],
+                "category": info["category"],
+                "confidence": int(confidence[a, index]) / 100,
+                "severity": info["severity"],
+                "matched_rules": list(MATCHED_RULES_BY_MASK[matched[a, index]]),
+                "auto_response": self.response_actions.get(attack_type),
+                "description": info["description"]
+            })
+        return results
+    
+    def _check_attack_rules(self, packet: Packet, attack_type: str) -> Optional[Dict[str, Any]]:
+        """Check if packet matches attack detection rules"""
+        info = self.info[attack_type]
+        confidence, matched = self._scorers[attack_type](packet)
+        
+        # Check confidence threshold
+        if confidence >= self.thresholds[attack_type]:
             return {
                 "attack_type": attack_type,
                 "attack_name": info["name"],
                 "category": info["category"],
-                "confidence": confidence,
+                "confidence": confidence / 100,
                 "severity": info["severity"],
-                "matched_rules": matched_rules,
+                "matched_rules": list(MATCHED_RULES_BY_MASK[matched]),
                 "auto_response": self.response_actions.get(attack_type),
                 "description": info["description"]
             }
         
         return None
     
-    def _check_tcp_flags(self, packet_flags: int, required_flags: List[str]) -> bool:
-        """Check if TCP flags match the required pattern"""
-        flag_map = {
-            "SYN": 0x02,
-            "ACK": 0x10,
-            "FIN": 0x01,
-            "RST": 0x04,
-            "PSH": 0x08,
-            "URG": 0x20,
-            "ECE": 0x40,
-            "CWR": 0x80,
-            "NULL": 0x00
-        }
+    def _compile_scorer(self, attack_type: str) -> Callable[[Packet], Tuple[int, int]]:
+        """Generate a function scoring a packet against one attack's rules
         
-        if len(required_flags) == 1:
-            required_flag = required_flags[0]
-            if required_flag in flag_map:
-                return packet_flags == flag_map[required_flag]
+        The rules are fixed once enabled, so only the checks this attack has are
+        emitted, with masks and protocol numbers inlined as constants. The function
+        returns (confidence in hundredths, MATCH_* bits).
+        """
+        rules = self.detection_rules[attack_type]
+        namespace = {"check_rate": self._check_connection_rate, "attack_type": attack_type}
+        lines = ["def score(packet):", "    confidence = 0", "    matched = 0"]
+        
+        def add_check(condition: str, weight: int, bit: int):
+            lines.append(f"    if {condition}:")
+            lines.append(f"        confidence += {weight}")
+            lines.append(f"        matched |= {bit}")
+        
+        # Check TCP flags
+        if "tcp_flags" in rules:
+            mask, exact = self.flag_masks[attack_type]
+            add_check(f"packet.flags == {mask}" if exact else f"(packet.flags & {mask}) == {mask}",
+                      WEIGHT_TCP_FLAGS, MATCH_TCP_FLAGS)
+        
+        # Check connection rate
+        if "connection_rate" in rules:
+            add_check("check_rate(packet, attack_type)", WEIGHT_CONNECTION_RATE, MATCH_CONNECTION_RATE)
+        
+        # Check protocol: integer compare when the producer supplied proto_id
+        # (PacketCapture does), protocol name compare otherwise (API/WebSocket input)
+        if "protocol" in rules:
+            name_check = f"packet.protocol.upper() == {rules['protocol'].upper()!r}"
+            rule_proto_id = self.protocol_ids[attack_type]
+            if rule_proto_id is not None:
+                lines.append("    proto_id = packet.proto_id")
+                condition = f"(proto_id == {rule_proto_id} if proto_id is not None else {name_check})"
+            else:
+                condition = name_check
+            add_check(condition, WEIGHT_PROTOCOL, MATCH_PROTOCOL)
         
-        # For multiple flags, check if all are present
+        # Check destination ports
+        if "dst_port" in rules:
+            namespace["ports"] = self.port_sets[attack_type]
+            add_check("packet.dst_port in ports", WEIGHT_DST_PORT, MATCH_DST_PORT)
+        
+        # Check unique ports
+        if "unique_ports" in rules:
+            # This would need to be tracked over time
+            # For now, we'll add a small confidence boost
+            lines.append(f"    confidence += {WEIGHT_UNIQUE_PORTS}")
+            lines.append(f"    matched |= {MATCH_UNIQUE_PORTS}")
+        
+        lines.append("    return confidence, matched")
+        exec(compile("\n".join(lines), f"<scorer {attack_type}>", "exec"), namespace)
+        return namespace["score"]
+    
+    @staticmethod
+    def _compile_tcp_flags(required_flags: List[str]) -> Tuple[int, bool]:
+        """Compile a "tcp_flags" rule to (mask, exact)
+        
+        A single known flag (including NULL) must match the packet flags exactly;
+        otherwise every flag in the mask must be set. Unknown flag names are ignored.
+        """
+        if len(required_flags) == 1 and required_flags[0] in TCP_FLAG_BITS:
+            return TCP_FLAG_BITS[required_flags[0]], True
+        
+        mask = 0
         for flag in required_flags:
-            if flag in flag_map:
-                if not (packet_flags & flag_map[flag]):
-                    return False
+            mask |= TCP_FLAG_BITS.get(flag, 0)
+        return mask, False
+    
+    def _check_connection_rate(self, packet: Packet, attack_type: str) -> bool:
+        """Record this packet for its source and check the attack's connection rate rule"""
+        rate_rule = self.rate_rules[attack_type]
+        if isinstance(rate_rule, bool):
+            return rate_rule
         
-        return True
+        op, limit, window = rate_rule
+        key = (attack_type, packet.src_ip)
+        now = time.monotonic()
+        with self._rate_lock:
+            events = self._rate_events.get(key)
+            if events is None:
+                if len(self._rate_events) >= MAX_RATE_TRACKERS:
+                    self._prune_rate_events(now)
+                # Only the newest limit + 1 packets can decide the comparison
+                events = self._rate_events[key] = deque(maxlen=limit + 1)
+            events.append(now)
+            while now - events[0] > window:
+                events.popleft()
+            count = len(events)
+        return RATE_COMPARATORS[op](count, limit)
     
-    def _check_connection_rate(self, packet_data: Dict[str, Any], rate_rule: str) -> bool:
-        """Check connection rate - simplified version"""
-        # This would need to be implemented with actual rate tracking
-        # For now, return True if the rule suggests high rate
-        return ">" in rate_rule or "high" in rate_rule.lower()
+    def _prune_rate_events(self, now: float):
+        """Drop rate trackers with no packets in the longest window (caller holds _rate_lock)"""
+        max_window = max(RATE_WINDOWS.values())
+        stale = [key for key, events in self._rate_events.items() if now - events[-1] > max_window]
+        for key in stale:
+            del self._rate_events[key]
+        if len(self._rate_events) >= MAX_RATE_TRACKERS:
+            # Still full of active sources: start over rather than grow without bound
+            self._rate_events.clear()
     
     def get_enabled_attacks(self) -> List[Dict[str, Any]]:
         """Get list of currently enabled attack detections"""
         enabled = []
         for attack_type in self.enabled_attacks:
-            info = AttackSubcategory.get_subcategory_info(attack_type)
+            info = self.info.get(attack_type)
             if info:
                 enabled.append({
                     "id": attack_type,
@@ -1,67 +1,215 @@
 #!/usr/bin/env python3
 """
 Check if model server is running and accessible
+
+Usage:
+    python check_server.py                      # localhost:9999
+    python check_server.py host[:port] ...      # probe several replicas concurrently
 """
 
+import asyncio
 import socket
-import json
+import struct
 import sys
 
+from model_protocol import HEADER, MAX_MESSAGE_SIZE, encode_message, loads, recv_message_into
+
+# The test request never changes, so frame it once
+_PROBE_FRAME = encode_message({
+    'srcip': '192.168.1.1',
+    'dstip': '192.168.1.2',
+    'src_port': 12345,
+    'dst_port': 80,
+    'protocol': 'tcp',
+    'packet_size': 100,
+    'duration': 0.1,
+    'timestamp': '2024-01-01T00:00:00'
+})
+
+# Persistent health-check connection, reused across probes of the same server
+_PROBE_SOCK = None
+_PROBE_ADDR = None
+
+# Probe responses are small; read them all into one reused buffer
+_RECV_BUF = bytearray(8192)
+
+# Probe sockets close with an RST (linger on, zero timeout) instead of leaving a
+# TIME_WAIT entry behind, so scripted probe loops can't exhaust ephemeral ports
+_LINGER_ABORT = struct.pack('ii', 1, 0)
+
+# (host, port) -> getaddrinfo entry, so repeated probes skip name resolution
+_ADDRINFO = {}
+
+# Keepalive timing so a dead server is noticed on an idle probe connection (Linux)
+KEEPALIVE_OPTIONS = (
+    ('TCP_KEEPIDLE', 60),
+    ('TCP_KEEPINTVL', 10),
+    ('TCP_KEEPCNT', 3),
+)
+
+def _get_probe_sock(host, port):
+    """Return the persistent probe connection, connecting it if needed"""
+    global _PROBE_SOCK, _PROBE_ADDR
+    if _PROBE_SOCK is not None and _PROBE_ADDR == (host, port):
+        return _PROBE_SOCK
+    close_probe_sock()
+    
+    addrinfo = _ADDRINFO.get((host, port))
+    if addrinfo is None:
+        addrinfo = socket.getaddrinfo(host, port, socket.AF_UNSPEC, socket.SOCK_STREAM)[0]
+        _ADDRINFO[(host, port)] = addrinfo
+    family, socktype, proto, _, sockaddr = addrinfo
+    
+    sock = socket.socket(family, socktype, proto)
+    try:
+        # Single small request/response: don't let Nagle hold it back
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_ABORT)
+        for name, value in KEEPALIVE_OPTIONS:
+            if hasattr(socket, name):
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, name), value)
+    except OSError:
+        pass
+    sock.settimeout(5)
+    try:
+        sock.connect(sockaddr)
+    except OSError:
+        sock.close()
+        # The name may resolve elsewhere now; look it up again next time
+        _ADDRINFO.pop((host, port), None)
+        raise
+    
+    _PROBE_SOCK, _PROBE_ADDR = sock, (host, port)
+    return sock
+
+def close_probe_sock():
+    """Close the persistent probe connection, if any"""
+    global _PROBE_SOCK, _PROBE_ADDR
+    if _PROBE_SOCK is not None:
+        try:
+            _PROBE_SOCK.close()
+        except OSError:
+            pass
+    _PROBE_SOCK = _PROBE_ADDR = None
+
+def _exchange(host, port, frame):
+    """Send one framed request on the probe connection and return the decoded response"""
+    sock = _get_probe_sock(host, port)
+    try:
+        # One length-prefixed frame each way, so short writes/reads can't split the JSON
+        sock.sendall(frame)
+        return recv_message_into(sock, _RECV_BUF)
+    except Exception:
+        # The stream may be mid-frame; never reuse it
+        close_probe_sock()
+        raise
+
+def _probe(host, port, frame):
+    """Exchange on the persistent connection, reconnecting once if it went stale"""
+    reused = _PROBE_SOCK is not None and _PROBE_ADDR == (host, port)
+    try:
+        return _exchange(host, port, frame)
+    except ConnectionError:
+        # Reset, broken pipe or EOF: the server restarted or dropped the idle
+        # connection since the last probe
+        if not reused:
+            raise
+    return _exchange(host, port, frame)
+
+def _report_result(label, result):
+    """Print a successful probe response"""
+    print(f"✅ {label} is running and responding")
+    print(f"📊 Test result: {result.get('attack_type', 'No threat')}")
+    print(f"🎯 Confidence: {result.get('confidence', 0):.2%}")
+    print(f"⚠️  Threat detected: {result.get('threat_detected', False)}")
+
+def _report_error(label, error):
+    """Print why a probe failed"""
+    if isinstance(error, ConnectionRefusedError):
+        print(f"❌ {label} is not running or not accepting connections")
+        print("💡 Start the model server with: python model_server.py")
+    elif isinstance(error, (socket.timeout, asyncio.TimeoutError)):
+        print(f"❌ {label} timeout - server may be busy")
+    else:
+        print(f"❌ Error connecting to {label}: {error}")
+
 def check_model_server(host='localhost', port=9999):
     """Check if model server is running"""
     try:
-        # Try to connect to the server
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(5)
-        sock.connect((host, port))
-        
         # Send a test request
-        test_data = {
-            'srcip': '192.168.1.1',
-            'dstip': '192.168.1.2',
-            'src_port': 12345,
-            'dst_port': 80,
-            'protocol': 'tcp',
-            'packet_size': 100,
-            'duration': 0.1,
-            'timestamp': '2024-01-01T00:00:00'
-        }
-        
-        json_data = json.dumps(test_data)
-        sock.send(json_data.encode('utf-8'))
-        
-        # Get response
-        response = sock.recv(8192).decode('utf-8')
-        result = json.loads(response)
-        
-        sock.close()
-        
-        print("✅ Model Server is running and responding")
-        print(f"📊 Test result: {result.get('attack_type', 'No threat')}")
-        print(f"🎯 Confidence: {result.get('confidence', 0):.2%}")
-        print(f"⚠️  Threat detected: {result.get('threat_detected', False)}")
-        
-        return True
-        
-    except ConnectionRefusedError:
-        print("❌ Model Server is not running or not accepting connections")
-        print("💡 Start the model server with: python model_server.py")
-        return False
-        
-    except socket.timeout:
-        print("❌ Model Server timeout - server may be busy")
-        return False
-        
+        result = _probe(host, port, _PROBE_FRAME)
     except Exception as e:
-        print(f"❌ Error connecting to Model Server: {e}")
+        _report_error("Model Server", e)
         return False
+    
+    _report_result("Model Server", result)
+    return True
+
+async def _check_one(host, port):
+    """Probe one server on its own short-lived asyncio connection"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_ABORT)
+        writer.write(_PROBE_FRAME)
+        await writer.drain()
+        (size,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+        if size > MAX_MESSAGE_SIZE:
+            raise ValueError(f"Message too large: {size} bytes")
+        return loads(await reader.readexactly(size))
+    finally:
+        writer.close()
+
+async def _check_all(targets, timeout):
+    """Run every probe concurrently; failures come back as exception objects"""
+    return await asyncio.gather(
+        *(asyncio.wait_for(_check_one(host, port), timeout) for host, port in targets),
+        return_exceptions=True
+    )
+
+def check_model_servers(targets, timeout=5.0):
+    """Check several model server replicas concurrently
+    
+    targets is a list of (host, port). Every probe runs at once, so the whole
+    check takes about one round trip instead of one per server. Returns a list
+    of booleans in target order.
+    """
+    results = asyncio.run(_check_all(targets, timeout))
+    
+    ready = []
+    for (host, port), result in zip(targets, results):
+        label = f"Model Server {host}:{port}"
+        if isinstance(result, BaseException):
+            _report_error(label, result)
+            ready.append(False)
+        else:
+            _report_result(label, result)
+            ready.append(True)
+    return ready
+
+def _parse_target(arg):
+    """Parse a host[:port] command-line argument"""
+    host, _, port = arg.rpartition(':')
+    if not host:
+        return arg, 9999
+    return host, int(port)
 
 def main():
     """Main check function"""
     print("🔍 Checking Cyber Sentinel Model Server")
     print("=" * 45)
     
-    if check_model_server():
+    if len(sys.argv) > 1:
+        # python check_server.py host[:port] [host[:port] ...]
+        ready = all(check_model_servers([_parse_target(arg) for arg in sys.argv[1:]]))
+    else:
+        ready = check_model_server()
+        close_probe_sock()
+    
+    if ready:
         print("\n🎉 Model Server is ready!")
         print("🌐 You can now start the web application:")
         print("   python run_fallback.py")
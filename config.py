@@ -3,68 +3,123 @@ Configuration settings for Cyber Sentinel ML Project
 Controls whether the system runs in production (real threats) or test mode (simulated threats)
 """
 
+import importlib.util
 import os
-from typing import Dict, Any
+from functools import cached_property, lru_cache
+from typing import Dict, Any, Optional
+
+
+@lru_cache(maxsize=None)
+def _is_module_available(module_name: str) -> bool:
+    """Check whether a module is installed without importing it (cached per process)"""
+    return importlib.util.find_spec(module_name) is not None
+
+
+_TRUE_VALUES = frozenset({'1', 'true', 'yes', 'on', 'y', 't'})
+
+
+def _env_flag(name: str, default: str) -> bool:
+    """Read a boolean environment variable: true/1/yes/on (any case) enable it"""
+    return os.environ.get(name, default).strip().lower() in _TRUE_VALUES
+
 
 class Config:
-    """Configuration class for Cyber Sentinel"""
+    """Configuration class for Cyber Sentinel
+
+    Settings are read from the environment on first access and then cached on
+    the instance; the environment-specific subclasses below pin some of them
+    with plain class attributes.
+    """
     
     # Mode Configuration
-    PRODUCTION_MODE = os.environ.get('CYBER_SENTINEL_PRODUCTION', 'true').lower() == 'true'
+    @cached_property
+    def PRODUCTION_MODE(self) -> bool:
+        return _env_flag('CYBER_SENTINEL_PRODUCTION', 'true')
     
     # Logging Configuration
-    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO' if PRODUCTION_MODE else 'DEBUG')
+    @cached_property
+    def LOG_LEVEL(self) -> str:
+        return os.environ.get('LOG_LEVEL', 'INFO' if self.PRODUCTION_MODE else 'DEBUG')
     
     # Packet Capture Configuration
-    PACKET_CAPTURE_ENABLED = os.environ.get('PACKET_CAPTURE_ENABLED', 'true' if PRODUCTION_MODE else 'false').lower() == 'true'
-    MAX_PACKETS_PER_SECOND = int(os.environ.get('MAX_PACKETS_PER_SECOND', '50' if PRODUCTION_MODE else '100'))
+    @cached_property
+    def PACKET_CAPTURE_ENABLED(self) -> bool:
+        return _env_flag('PACKET_CAPTURE_ENABLED', 'true' if self.PRODUCTION_MODE else 'false')
+    
+    @cached_property
+    def MAX_PACKETS_PER_SECOND(self) -> int:
+        return int(os.environ.get('MAX_PACKETS_PER_SECOND', '50' if self.PRODUCTION_MODE else '100'))
     
     # Model Server Configuration
-    MODEL_SERVER_HOST = os.environ.get('MODEL_SERVER_HOST', 'localhost')
-    MODEL_SERVER_PORT = int(os.environ.get('MODEL_SERVER_PORT', '9999'))
+    @cached_property
+    def MODEL_SERVER_HOST(self) -> str:
+        return os.environ.get('MODEL_SERVER_HOST', 'localhost')
+    
+    @cached_property
+    def MODEL_SERVER_PORT(self) -> int:
+        return int(os.environ.get('MODEL_SERVER_PORT', '9999'))
+    
+    @cached_property
+    def MODEL_SERVER_SOCKET(self) -> str:
+        # Unix socket for same-host IPC
+        return os.environ.get('MODEL_SERVER_SOCKET', '/tmp/cyber_sentinel.sock')
     
     # Web Application Configuration
-    WEB_HOST = os.environ.get('WEB_HOST', '0.0.0.0')
-    WEB_PORT = int(os.environ.get('WEB_PORT', '5000'))
-    DEBUG_MODE = not PRODUCTION_MODE  # Debug mode only in test mode
+    @cached_property
+    def WEB_HOST(self) -> str:
+        return os.environ.get('WEB_HOST', '0.0.0.0')
+    
+    @cached_property
+    def WEB_PORT(self) -> int:
+        return int(os.environ.get('WEB_PORT', '5000'))
+    
+    @cached_property
+    def DEBUG_MODE(self) -> bool:
+        return not self.PRODUCTION_MODE  # Debug mode only in test mode
+    
+    @cached_property
+    def SOCKETIO_MESSAGE_QUEUE(self) -> Optional[str]:
+        # Shared SocketIO message queue (e.g. redis://localhost:6379/0); required when
+        # running more than one web worker so emits reach clients on every worker
+        return os.environ.get('SOCKETIO_MESSAGE_QUEUE') or None
     
     # Security Configuration
-    RATE_LIMITING_ENABLED = PRODUCTION_MODE
-    THREAT_RATE_LIMIT_SECONDS = int(os.environ.get('THREAT_RATE_LIMIT_SECONDS', '5'))
+    @cached_property
+    def RATE_LIMITING_ENABLED(self) -> bool:
+        return self.PRODUCTION_MODE
+    
+    @cached_property
+    def THREAT_RATE_LIMIT_SECONDS(self) -> int:
+        return int(os.environ.get('THREAT_RATE_LIMIT_SECONDS', '5'))
     
     # Test/Simulation Configuration
-    SAMPLE_TRAFFIC_ENABLED = not PRODUCTION_MODE  # Only in test mode
+    @cached_property
+    def SAMPLE_TRAFFIC_ENABLED(self) -> bool:
+        return not self.PRODUCTION_MODE  # Only in test mode
+    
     TEST_ENDPOINTS_ENABLED = True  # Available in both modes but clearly marked
     
-    @classmethod
-    def get_mode_info(cls) -> Dict[str, Any]:
+    def get_mode_info(self) -> Dict[str, Any]:
         """Get current mode information"""
         return {
-            'mode': 'PRODUCTION' if cls.PRODUCTION_MODE else 'TEST/DEVELOPMENT',
-            'real_threat_detection': cls.PRODUCTION_MODE,
-            'packet_capture_active': cls.PACKET_CAPTURE_ENABLED,
-            'sample_traffic_active': cls.SAMPLE_TRAFFIC_ENABLED,
-            'debug_mode': cls.DEBUG_MODE,
-            'rate_limiting': cls.RATE_LIMITING_ENABLED
+            'mode': 'PRODUCTION' if self.PRODUCTION_MODE else 'TEST/DEVELOPMENT',
+            'real_threat_detection': self.PRODUCTION_MODE,
+            'packet_capture_active': self.PACKET_CAPTURE_ENABLED,
+            'sample_traffic_active': self.SAMPLE_TRAFFIC_ENABLED,
+            'debug_mode': self.DEBUG_MODE,
+            'rate_limiting': self.RATE_LIMITING_ENABLED
         }
     
     @classmethod
     def validate_production_requirements(cls) -> Dict[str, bool]:
         """Validate that production requirements are met"""
         requirements = {
-            'scapy_available': False,
+            'scapy_available': _is_module_available('scapy'),
             'admin_privileges': False,  # This would need runtime check
             'model_server_running': False,  # This would need runtime check
             'proper_interface': False  # This would need runtime check
         }
         
-        # Check if Scapy is available
-        try:
-            import scapy
-            requirements['scapy_available'] = True
-        except ImportError:
-            pass
-        
         return requirements
 
 # Environment-specific configurations
@@ -103,9 +158,14 @@ config_map = {
     'default': Config
 }
 
+@lru_cache(maxsize=None)
+def _config_instance(config_name: str) -> Config:
+    """One shared settings object per configuration name"""
+    return config_map.get(config_name, Config)()
+
 def get_config(config_name: str = None) -> Config:
     """Get configuration by name"""
     if config_name is None:
         config_name = os.environ.get('CYBER_SENTINEL_ENV', 'default')
     
-    return config_map.get(config_name, Config)()
+    return _config_instance(config_name)
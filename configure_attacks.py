@@ -4,89 +4,82 @@ Attack Categories Configuration Script
 Enable/disable specific attack types for automatic detection
 """
 
+import os
 import sys
 import json
 import requests
 from datetime import datetime
 from attack_categories import AttackSubcategory, auto_detector
 
+# Optional streaming JSON parser: load only the enabled_attacks array
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+CONFIG_FILE = 'attack_config.json'
+
+# The category tree is static, so walk it once per process
+_CATEGORIES = AttackSubcategory.get_all_categories()
+_BY_ID = {subcat['id']: subcat for category in _CATEGORIES for subcat in category['subcategories']}
+_ID_SET = frozenset(_BY_ID)
+_CRITICAL_IDS = frozenset(attack_id for attack_id, subcat in _BY_ID.items() if subcat['severity'] == 'CRITICAL')
+_BY_CATEGORY = {
+    category['category']: frozenset(subcat['id'] for subcat in category['subcategories'])
+    for category in _CATEGORIES
+}
+
 def show_available_categories():
     """Display all available attack categories"""
-    print("🔧 Cyber Sentinel Attack Categories")
-    print("=" * 50)
-    
-    categories = AttackSubcategory.get_all_categories()
+    lines = ["🔧 Cyber Sentinel Attack Categories", "=" * 50]
     
-    for i, category in enumerate(categories, 1):
-        print(f"\n{i}. {category['category']}")
+    enabled = auto_detector.enabled_attacks
+    for i, category in enumerate(_CATEGORIES, 1):
+        lines.append(f"\n{i}. {category['category']}")
         for j, subcat in enumerate(category['subcategories'], 1):
-            status = "✅" if subcat['id'] in auto_detector.enabled_attacks else "❌"
-            print(f"   {j}.{status} {subcat['name']} ({subcat['severity']})")
-            print(f"      {subcat['description']}")
-            print(f"      Response: {subcat['auto_response']}")
+            status = "✅" if subcat['id'] in enabled else "❌"
+            lines.append(f"   {j}.{status} {subcat['name']} ({subcat['severity']})")
+            lines.append(f"      {subcat['description']}")
+            lines.append(f"      Response: {subcat['auto_response']}")
+    
+    # One write instead of a print (and terminal flush) per line
+    sys.stdout.write("\n".join(lines) + "\n")
 
 def enable_critical_attacks():
     """Enable all critical severity attacks"""
-    critical_attacks = []
-    categories = AttackSubcategory.get_all_categories()
-    
-    for category in categories:
-        for subcat in category['subcategories']:
-            if subcat['severity'] == 'CRITICAL':
-                critical_attacks.append(subcat['id'])
-    
+    critical_attacks = _CRITICAL_IDS
     auto_detector.enable_attack_detection(critical_attacks)
     print(f"✅ Enabled {len(critical_attacks)} critical attack types")
 
 def enable_port_scans():
     """Enable all port scan detection"""
-    port_scan_attacks = []
-    categories = AttackSubcategory.get_all_categories()
-    
-    for category in categories:
-        if category['category'] == 'Port Scan':
-            for subcat in category['subcategories']:
-                port_scan_attacks.append(subcat['id'])
-    
+    port_scan_attacks = _BY_CATEGORY.get('Port Scan', frozenset())
     auto_detector.enable_attack_detection(port_scan_attacks)
     print(f"✅ Enabled {len(port_scan_attacks)} port scan types")
 
 def enable_all_attacks():
     """Enable all attack types"""
-    all_attacks = []
-    categories = AttackSubcategory.get_all_categories()
-    
-    for category in categories:
-        for subcat in category['subcategories']:
-            all_attacks.append(subcat['id'])
-    
+    all_attacks = _ID_SET
     auto_detector.enable_attack_detection(all_attacks)
     print(f"✅ Enabled {len(all_attacks)} attack types")
 
 def disable_all_attacks():
     """Disable all attack types"""
-    enabled = list(auto_detector.enabled_attacks)
+    # Snapshot: disabling mutates enabled_attacks while iterating the argument
+    enabled = frozenset(auto_detector.enabled_attacks)
     auto_detector.disable_attack_detection(enabled)
     print(f"🚫 Disabled {len(enabled)} attack types")
 
 def enable_specific_attacks(attack_ids):
     """Enable specific attack types by ID"""
-    valid_attacks = []
-    invalid_attacks = []
-    
-    for attack_id in attack_ids:
-        info = AttackSubcategory.get_subcategory_info(attack_id)
-        if info:
-            valid_attacks.append(attack_id)
-        else:
-            invalid_attacks.append(attack_id)
-    
+    attack_ids = frozenset(attack_ids)
+    invalid_attacks = sorted(attack_ids - _ID_SET)
     if invalid_attacks:
         print(f"❌ Invalid attack IDs: {invalid_attacks}")
         return False
     
-    auto_detector.enable_attack_detection(valid_attacks)
-    print(f"✅ Enabled {len(valid_attacks)} attack types")
+    auto_detector.enable_attack_detection(attack_ids)
+    print(f"✅ Enabled {len(attack_ids)} attack types")
     return True
 
 def save_configuration():
@@ -96,18 +89,27 @@ def save_configuration():
         'timestamp': str(datetime.now())
     }
     
-    with open('attack_config.json', 'w') as f:
-        json.dump(config, f, indent=2)
-    
-    print("💾 Configuration saved to attack_config.json")
+    # Write a temp file and rename it over the old one so a crash mid-write
+    # never leaves a truncated configuration behind
+    data = json.dumps(config, separators=(',', ':')).encode('utf-8')
+    tmp_path = CONFIG_FILE + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, CONFIG_FILE)
+    
+    print(f"💾 Configuration saved to {CONFIG_FILE}")
 
 def load_configuration():
     """Load configuration from file"""
     try:
-        with open('attack_config.json', 'r') as f:
-            config = json.load(f)
+        with open(CONFIG_FILE, 'rb') as f:
+            if ijson is not None:
+                enabled = list(ijson.items(f, 'enabled_attacks.item'))
+            else:
+                enabled = json.loads(f.read()).get('enabled_attacks', [])
         
-        enabled = config.get('enabled_attacks', [])
         auto_detector.enable_attack_detection(enabled)
         print(f"📂 Loaded configuration with {len(enabled)} enabled attacks")
         return True
@@ -122,11 +124,10 @@ def show_status():
     """Show current detection status"""
     enabled = auto_detector.get_enabled_attacks()
     
-    print(f"📊 Current Status:")
-    print(f"   Enabled Attacks: {len(enabled)}")
+    lines = ["📊 Current Status:", f"   Enabled Attacks: {len(enabled)}"]
     
     if enabled:
-        print("   Active Categories:")
+        lines.append("   Active Categories:")
         categories = {}
         for attack in enabled:
             category = attack['category']
@@ -135,9 +136,11 @@ def show_status():
             categories[category].append(attack['name'])
         
         for category, attacks in categories.items():
-            print(f"     • {category}: {len(attacks)} attacks")
+            lines.append(f"     • {category}: {len(attacks)} attacks")
     else:
-        print("   No attacks currently enabled")
+        lines.append("   No attacks currently enabled")
+    
+    sys.stdout.write("\n".join(lines) + "\n")
 
 def main():
     """Main configuration function"""
@@ -1,3 +1,9 @@
+import os
+import queue
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
 import pandas as pd
 import numpy as np
 import tensorflow as tf
@@ -6,13 +12,56 @@ try:
 except ImportError:
     # Fallback for different TensorFlow versions
     from keras import layers, models, optimizers, losses, metrics
+from joblib import parallel_backend
 from sklearn.ensemble import RandomForestClassifier, VotingClassifier
+from sklearn.preprocessing import StandardScaler
 from xgboost import XGBClassifier
 from lightgbm import LGBMClassifier
 import logging
 
+# Optional LLVM-compiled LightGBM inference
+try:
+    import lleaves
+except ImportError:
+    lleaves = None
+
 logger = logging.getLogger(__name__)
 
+# Index order of the TRM attack_type head
+ATTACK_TYPES = ['Normal', 'Analysis', 'Backdoor', 'DoS', 'Exploits',
+                'Fuzzers', 'Generic', 'Reconnaissance', 'Shellcode', 'Worms']
+
+# Mini-batch size for TRM training
+TRM_BATCH_SIZE = 256
+# Batch sizes TRM inference is padded to, so XLA compiles only these shapes
+PREDICT_BUCKETS = (1, 8, 64)
+
+GPU_AVAILABLE = bool(tf.config.list_physical_devices('GPU'))
+
+# Half-precision compute only pays off on GPUs (Tensor Cores); on CPU it is slower.
+# The output heads stay float32 for numerically stable sigmoid/softmax.
+MIXED_PRECISION = GPU_AVAILABLE
+if MIXED_PRECISION:
+    tf.keras.mixed_precision.set_global_policy('mixed_float16')
+
+# Optional JIT for the per-request feature normalization
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """Stand-in decorator: run the plain NumPy version without Numba"""
+        def decorate(func):
+            return func
+        return decorate
+
+@njit(cache=True)
+def _fit_features(x, n):
+    """Copy x into a new float32 vector of length n, zero-padded or truncated"""
+    out = np.zeros(n, np.float32)
+    m = min(x.size, n)
+    out[:m] = x[:m]
+    return out
+
 # ---------------- TRM Model ----------------
 class TinyRecursiveModel(tf.keras.Model):
     def __init__(self, input_dim, hidden_dim=128, recursive_steps=3):
@@ -27,35 +76,56 @@ class TinyRecursiveModel(tf.keras.Model):
         self.attention_gate = layers.Dense(hidden_dim, activation='sigmoid')
         
         # Multi-output heads
-        self.threat_head = layers.Dense(1, activation='sigmoid')
-        self.attack_type_head = layers.Dense(10, activation='softmax')  # 9 attacks + normal
-        self.confidence_head = layers.Dense(1, activation='sigmoid')
-        self.severity_head = layers.Dense(4, activation='softmax')  # LOW, MEDIUM, HIGH, CRITICAL
+        self.threat_head = layers.Dense(1, activation='sigmoid', dtype='float32')
+        self.attack_type_head = layers.Dense(10, activation='softmax', dtype='float32')  # 9 attacks + normal
+        self.confidence_head = layers.Dense(1, activation='sigmoid', dtype='float32')
+        self.severity_head = layers.Dense(4, activation='softmax', dtype='float32')  # LOW, MEDIUM, HIGH, CRITICAL
         
         logger.info(f"🧠 TRM Initialized (hidden_dim={hidden_dim}, recursive_steps={recursive_steps})")
     
     def call(self, inputs, training=False, return_all_steps=False):
-        batch_size = tf.shape(inputs)[0]
         h = self.feature_projection(inputs)
         initial_state = tf.identity(h)
+        # Same shape and dtype as h (hidden_dim units), with no separate shape lookup
+        state = [tf.zeros_like(h)]
+        
+        if not return_all_steps:
+            # Only the final prediction is needed: run the recursion as one loop op
+            # instead of recursive_steps unrolled copies, and the heads only once
+            if self.recursive_steps > 0:
+                # The first step runs outside the loop so the layers are built there
+                # (variables can't be created inside tf.while_loop)
+                h, state = self._recursive_step(h, state, initial_state)
+                
+                def body(step, h, state):
+                    h, state = self._recursive_step(h, state, initial_state)
+                    return step + 1, h, state
+                
+                # A static trip count lets XLA size the gradient accumulators when
+                # the loop is differentiated inside the jit-compiled train step
+                _, h, state = tf.while_loop(
+                    lambda step, h, state: step < self.recursive_steps,
+                    body,
+                    loop_vars=(tf.constant(1), h, state),
+                    maximum_iterations=self.recursive_steps - 1
+                )
+            return self._compute_step_predictions(h, self.recursive_steps)
         
         all_states = [h]
         step_predictions = []
-        state = [tf.zeros((batch_size, self.hidden_dim))]
-        
         for step in range(self.recursive_steps):
-            h, state = self.recursive_cell(h, state)
-            attention_input = tf.concat([h, initial_state], axis=1)
-            attention_weights = self.attention_gate(attention_input)
-            h = h * attention_weights
-            
+            h, state = self._recursive_step(h, state, initial_state)
             all_states.append(h)
             step_predictions.append(self._compute_step_predictions(h, step))
         
         final_predictions = self._compute_step_predictions(h, self.recursive_steps)
-        if return_all_steps:
-            return final_predictions, all_states, step_predictions
-        return final_predictions
+        return final_predictions, all_states, step_predictions
+    
+    def _recursive_step(self, h, state, initial_state):
+        h, state = self.recursive_cell(h, state)
+        attention_input = tf.concat([h, initial_state], axis=1)
+        attention_weights = self.attention_gate(attention_input)
+        return h * attention_weights, state
     
     def _compute_step_predictions(self, hidden_state, step):
         return {
@@ -71,7 +141,9 @@ class CyberSentinel:
     def __init__(self, feature_names):
         self.feature_names = feature_names
         self.trm_model = None
+        self._predict_fn = None
         self.ensemble_model = None
+        self._ensemble_scorers = None
         self.is_trained = False
         
         self.threat_intel = {
@@ -93,12 +165,21 @@ class CyberSentinel:
                 'Worms': 'Network segmentation and antivirus updates'
             }
         }
+        # Severity and action per ATTACK_TYPES index, so results need no dict lookups
+        self._severity_by_idx = np.array(
+            [self.threat_intel['severity_map'].get(a, 'HIGH') for a in ATTACK_TYPES], dtype=object)
+        self._action_by_idx = np.array(
+            [self.threat_intel['action_recommendations'].get(a, 'Investigate') for a in ATTACK_TYPES], dtype=object)
+        # Compile (or load the cached) feature normalizer before the first request
+        _fit_features(np.zeros(1, np.float32), 1)
         logger.info("🛡️ Cyber Sentinel initialized!")
     
     def train_models(self, X_train, y_train_binary, y_train_attack, epochs=30):
         logger.info("🎯 Training Cyber Sentinel models...")
         self._train_trm(X_train, y_train_binary, y_train_attack, epochs)
+        self._predict_fn = self._make_predict_fn() if self.trm_model else None
         self._train_ensemble(X_train, y_train_binary)
+        self._ensemble_scorers = self._make_ensemble_scorers() if self.ensemble_model is not None else None
         self.is_trained = True
         logger.info("✅ All models trained successfully!")
     
@@ -107,46 +188,64 @@ class CyberSentinel:
             self.trm_model = TinyRecursiveModel(input_dim=X_train.shape[1])
             # Build model manually to avoid count_params error
             self.trm_model.build(input_shape=(None, X_train.shape[1]))
+            # One eager forward pass creates the layer variables (Keras 3's build()
+            # doesn't) before train_step captures trainable_variables
+            self.trm_model(tf.zeros((1, X_train.shape[1]), tf.float32))
             
-            X_tensor = tf.convert_to_tensor(X_train, dtype=tf.float32)
-            
-            # Handle both pandas Series and numpy arrays
-            if hasattr(y_train_binary, 'values'):
-                y_binary_values = y_train_binary.values
-            else:
-                y_binary_values = y_train_binary
-            y_binary_tensor = tf.convert_to_tensor(y_binary_values, dtype=tf.float32)
-            
-            attack_types = ['Normal', 'Analysis', 'Backdoor', 'DoS', 'Exploits', 
-                            'Fuzzers', 'Generic', 'Reconnaissance', 'Shellcode', 'Worms']
-            attack_mapping = {attack: idx for idx, attack in enumerate(attack_types)}
-            
-            # Handle both pandas Series and numpy arrays
-            if hasattr(y_train_attack, 'values'):
-                y_attack_values = y_train_attack.values
-            elif hasattr(y_train_attack, 'tolist'):
-                y_attack_values = y_train_attack.tolist()
-            else:
-                y_attack_values = list(y_train_attack)
+            # NumPy inputs go straight into tf.data; no separate full-size tensor copies
+            X_values = np.asarray(X_train, dtype=np.float32)
+            y_binary_values = np.asarray(y_train_binary, dtype=np.float32)
             
-            y_attack_tensor = tf.convert_to_tensor([
-                attack_mapping.get(str(label), 0) for label in y_attack_values
-            ], dtype=tf.int32)
+            # Label -> ATTACK_TYPES index in C; unknown labels (code -1) count as Normal
+            attack_codes = pd.Categorical(
+                np.asarray(y_train_attack).astype(str), categories=ATTACK_TYPES
+            ).codes
+            y_attack_values = np.where(attack_codes < 0, 0, attack_codes).astype(np.int32)
             
             optimizer = optimizers.Adam(learning_rate=0.001)
+            if MIXED_PRECISION:
+                # Scale the loss so float16 gradients don't underflow
+                optimizer = tf.keras.mixed_precision.LossScaleOptimizer(optimizer)
             loss_fn_binary = losses.BinaryCrossentropy()
             loss_fn_attack = losses.SparseCategoricalCrossentropy()
+            trainable_vars = self.trm_model.trainable_variables
             
-            for epoch in range(epochs):
+            # One compiled (XLA-fused) forward/backward/update per mini-batch
+            @tf.function(jit_compile=True)
+            def train_step(x_batch, y_binary_batch, y_attack_batch):
                 with tf.GradientTape() as tape:
-                    predictions = self.trm_model(X_tensor, training=True)
-                    threat_loss = loss_fn_binary(y_binary_tensor, predictions['threat_binary'])
-                    attack_loss = loss_fn_attack(y_attack_tensor, predictions['attack_type'])
+                    predictions = self.trm_model(x_batch, training=True)
+                    threat_loss = loss_fn_binary(y_binary_batch, predictions['threat_binary'])
+                    attack_loss = loss_fn_attack(y_attack_batch, predictions['attack_type'])
                     total_loss = threat_loss + attack_loss
+                    if MIXED_PRECISION and hasattr(optimizer, 'get_scaled_loss'):
+                        scaled_loss = optimizer.get_scaled_loss(total_loss)
+                    elif MIXED_PRECISION:
+                        # Keras 3: apply_gradients unscales the gradients itself
+                        scaled_loss = optimizer.scale_loss(total_loss)
+                    else:
+                        scaled_loss = total_loss
+                grads = tape.gradient(scaled_loss, trainable_vars)
+                if MIXED_PRECISION and hasattr(optimizer, 'get_unscaled_gradients'):
+                    grads = optimizer.get_unscaled_gradients(grads)
+                optimizer.apply_gradients(zip(grads, trainable_vars))
+                return total_loss
+            
+            # Built once and cached after the first epoch; reshuffled every epoch, and
+            # the next batch is prepared while the current train_step runs
+            dataset = (
+                tf.data.Dataset.from_tensor_slices((X_values, y_binary_values, y_attack_values))
+                .cache()
+                .shuffle(buffer_size=X_values.shape[0], seed=42, reshuffle_each_iteration=True)
+                .batch(TRM_BATCH_SIZE)
+                .prefetch(tf.data.AUTOTUNE)
+            )
+            
+            for epoch in range(epochs):
+                for x_batch, y_binary_batch, y_attack_batch in dataset:
+                    total_loss = train_step(x_batch, y_binary_batch, y_attack_batch)
                 
-                grads = tape.gradient(total_loss, self.trm_model.trainable_variables)
-                optimizer.apply_gradients(zip(grads, self.trm_model.trainable_variables))
-                
+                # Reading the loss syncs with the device, so only do it when logging
                 if epoch % 10 == 0:
                     try:
                         loss_val = float(total_loss.numpy())
@@ -165,6 +264,93 @@ class CyberSentinel:
                 logger.error(f"Failed to create fallback TRM model: {fallback_error}")
                 self.trm_model = None
     
+    def _compile_predict_graph(self, jit_compile=True):
+        """TRM inference as one tf.function over a [None, D] float32 signature
+        
+        Returns (N, 3) float32 rows of [attack_type index, threat_binary, confidence]
+        so a prediction needs a single device-to-host copy.
+        """
+        model = self.trm_model
+        
+        # XLA fuses each step's concat + gate matmul + sigmoid + multiply, as in training
+        @tf.function(input_signature=[tf.TensorSpec([None, model.input_dim], tf.float32)],
+                     jit_compile=jit_compile)
+        def predict_fn(x):
+            pred = model(x, training=False)
+            attack_idx = tf.cast(tf.argmax(pred['attack_type'], axis=1), tf.float32)
+            return tf.stack([attack_idx, pred['threat_binary'][:, 0], pred['confidence'][:, 0]], axis=1)
+        
+        return predict_fn
+    
+    def _make_predict_fn(self):
+        """XLA-compiled TRM inference that pads each batch to a bucket size
+        
+        XLA compiles once per distinct input shape, so batches (1 to 64 rows from
+        AssessmentBatcher, any size from assess_threat_batch) are zero-padded to
+        PREDICT_BUCKETS, or the next power of two above them. Only a handful of
+        shapes ever get compiled; the padding rows are dropped from the output.
+        """
+        compiled = self._compile_predict_graph(jit_compile=True)
+        
+        def predict_fn(x):
+            x = np.asarray(x, dtype=np.float32)
+            n = x.shape[0]
+            bucket = next((b for b in PREDICT_BUCKETS if b >= n), None)
+            if bucket is None:
+                bucket = 1 << (n - 1).bit_length()
+            if bucket != n:
+                padded = np.zeros((bucket, x.shape[1]), np.float32)
+                padded[:n] = x
+                x = padded
+            return compiled(x).numpy()[:n]
+        
+        return predict_fn
+    
+    def export_tflite(self, representative_data=None):
+        """Convert the trained TRM inference function to a quantized TFLite model
+        
+        Weights are quantized to INT8. With representative_data (a sample of
+        preprocessed training rows) activations are calibrated and quantized too.
+        Returns the flatbuffer bytes, for enable_tflite or writing to disk.
+        """
+        if self.trm_model is None:
+            raise ValueError("TRM model not trained")
+        converter = tf.lite.TFLiteConverter.from_concrete_functions(
+            [self._compile_predict_graph(jit_compile=False).get_concrete_function()], self.trm_model
+        )
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if representative_data is not None:
+            samples = np.asarray(representative_data, dtype=np.float32)[:200]
+            converter.representative_dataset = lambda: ([row[np.newaxis]] for row in samples)
+            # The GRU loop may need float kernels for ops without an INT8 version
+            converter.target_spec.supported_ops = [
+                tf.lite.OpsSet.TFLITE_BUILTINS_INT8, tf.lite.OpsSet.TFLITE_BUILTINS
+            ]
+        return converter.convert()
+    
+    def enable_tflite(self, tflite_model):
+        """Serve TRM assessments from a TFLite interpreter (see export_tflite)"""
+        interpreter = tf.lite.Interpreter(model_content=tflite_model)
+        input_index = interpreter.get_input_details()[0]['index']
+        output_index = interpreter.get_output_details()[0]['index']
+        interpreter.resize_tensor_input(input_index, [1, len(self.feature_names)])
+        interpreter.allocate_tensors()
+        # An interpreter holds one set of tensors, so calls must not overlap
+        lock = threading.Lock()
+        
+        def predict_fn(x):
+            x = np.asarray(x, dtype=np.float32)
+            with lock:
+                if tuple(interpreter.get_input_details()[0]['shape']) != x.shape:
+                    # Batch size changed (see assess_threat_batch)
+                    interpreter.resize_tensor_input(input_index, x.shape)
+                    interpreter.allocate_tensors()
+                interpreter.set_tensor(input_index, x)
+                interpreter.invoke()
+                return interpreter.get_tensor(output_index)
+        
+        self._predict_fn = predict_fn
+    
     def _train_ensemble(self, X_train, y_train_binary):
         try:
             # Handle both pandas Series and numpy arrays
@@ -173,18 +359,29 @@ class CyberSentinel:
             else:
                 y_train_values = y_train_binary
             
+            # Histogram tree building everywhere; each model fits single-threaded
+            # while VotingClassifier runs the three fits side by side, so the
+            # nested thread pools don't oversubscribe the cores
+            xgb_params = {'device': 'cuda'} if GPU_AVAILABLE else {}
             models_dict = {
-                'xgb': XGBClassifier(n_estimators=100, random_state=42, verbosity=0),
-                'rf': RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1),
-                'lgbm': LGBMClassifier(n_estimators=100, random_state=42, verbosity=-1)
+                'xgb': XGBClassifier(n_estimators=100, random_state=42, verbosity=0,
+                                     tree_method='hist', n_jobs=1, **xgb_params),
+                'rf': RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=1),
+                'lgbm': LGBMClassifier(n_estimators=100, random_state=42, verbosity=-1,
+                                       force_col_wise=True, n_jobs=1)
             }
             self.ensemble_model = VotingClassifier(
                 estimators=list(models_dict.items()),
                 voting='soft',
-                n_jobs=-1
+                n_jobs=len(models_dict)
             )
             logger.info("Training ensemble model...")
-            self.ensemble_model.fit(X_train, y_train_values)
+            # One float32 copy shared by all three fits: the tree builders release
+            # the GIL, so threads run them in parallel without pickling X_train
+            # into worker processes the way the default loky backend would
+            X_train = np.asarray(X_train, dtype=np.float32)
+            with parallel_backend('threading', n_jobs=len(models_dict)):
+                self.ensemble_model.fit(X_train, y_train_values)
             logger.info("Ensemble model trained successfully")
         except Exception as e:
             logger.error(f"Error training ensemble: {e}")
@@ -203,49 +400,55 @@ class CyberSentinel:
                 logger.error(f"Failed to train fallback ensemble model: {fallback_error}")
                 self.ensemble_model = None
     
+    def _make_ensemble_scorers(self):
+        """predict_proba callables whose mean is the ensemble's soft vote
+        
+        Calling the fitted estimators directly skips VotingClassifier's per-call
+        validation and stacking; LightGBM runs as an lleaves-compiled model when
+        lleaves is installed.
+        """
+        if not isinstance(self.ensemble_model, VotingClassifier):
+            return [self.ensemble_model.predict_proba]
+        
+        scorers = []
+        names = [name for name, _ in self.ensemble_model.estimators]
+        for name, estimator in zip(names, self.ensemble_model.estimators_):
+            if name == 'lgbm' and lleaves is not None:
+                try:
+                    scorers.append(self._compile_lgbm(estimator))
+                    continue
+                except Exception as e:
+                    logger.warning(f"lleaves compilation failed, using LightGBM predict: {e}")
+            scorers.append(estimator.predict_proba)
+        return scorers
+    
+    @staticmethod
+    def _compile_lgbm(estimator):
+        """Compile a fitted binary LGBMClassifier with lleaves; returns a predict_proba"""
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+            f.write(estimator.booster_.model_to_string())
+            model_path = f.name
+        try:
+            model = lleaves.Model(model_file=model_path)
+            model.compile()
+        finally:
+            os.remove(model_path)
+        
+        def predict_proba(x):
+            positive = model.predict(np.asarray(x, dtype=np.float64))
+            return np.column_stack([1.0 - positive, positive])
+        
+        return predict_proba
+    
     def assess_threat(self, features, use_trm=True):
         if not self.is_trained:
             return {"error": "Model not trained"}
         
-        # Convert features to proper format
-        try:
-            if isinstance(features, dict):
-                # If features is a dict, try to extract a list/array
-                if 'features' in features:
-                    features = features['features']
-                elif len(features) > 0:
-                    # Try to convert dict values to list
-                    features = list(features.values())
-                else:
-                    return {"error": "Invalid features format: empty dict"}
-            
-            # Ensure features is a list or array
-            if not isinstance(features, (list, tuple, np.ndarray)):
-                return {"error": f"Features must be list, tuple, or array, got {type(features)}"}
-            
-            # Convert to numpy array and ensure it's 1D
-            features_array = np.array(features, dtype=np.float32)
-            if features_array.ndim == 0:
-                return {"error": "Features cannot be a scalar"}
-            if features_array.ndim > 1:
-                features_array = features_array.flatten()
-            
-            # Check feature count matches
-            expected_features = len(self.feature_names)
-            if len(features_array) != expected_features:
-                logger.warning(f"Feature count mismatch: got {len(features_array)}, expected {expected_features}")
-                # Try to pad or truncate
-                if len(features_array) < expected_features:
-                    features_array = np.pad(features_array, (0, expected_features - len(features_array)), mode='constant')
-                else:
-                    features_array = features_array[:expected_features]
-        
-        except Exception as e:
-            logger.error(f"Error processing features: {e}")
-            return {"error": f"Feature processing failed: {str(e)}"}
+        features_array = self._prepare_features(features)
+        if isinstance(features_array, dict):
+            return features_array
         
-        attack_types = ['Normal', 'Analysis', 'Backdoor', 'DoS', 'Exploits', 
-                        'Fuzzers', 'Generic', 'Reconnaissance', 'Shellcode', 'Worms']
+        attack_types = ATTACK_TYPES
         if use_trm and self.trm_model:
             return self._trm_assessment(features_array, attack_types)
         else:
@@ -253,18 +456,15 @@ class CyberSentinel:
     
     def _trm_assessment(self, features, attack_types):
         try:
-            # Ensure features is 2D for model input
-            if isinstance(features, np.ndarray):
-                if features.ndim == 1:
-                    features_tensor = tf.convert_to_tensor([features], dtype=tf.float32)
-                else:
-                    features_tensor = tf.convert_to_tensor(features, dtype=tf.float32)
-            else:
-                features_tensor = tf.convert_to_tensor([features], dtype=tf.float32)
+            # 2-D float32 rows go to _predict_fn as-is; it pads them in NumPy
+            features = np.asarray(features, dtype=np.float32)
+            features = features.reshape(-1, features.shape[-1])
             
             # Get predictions
             try:
-                final_pred, all_states, step_preds = self.trm_model(features_tensor, training=False, return_all_steps=True)
+                if self._predict_fn is None:
+                    self._predict_fn = self._make_predict_fn()
+                outputs = self._predict_fn(features)[0]
             except Exception as e:
                 logger.error(f"TRM model prediction error: {e}")
                 return {
@@ -277,16 +477,7 @@ class CyberSentinel:
             
             # Extract predictions safely
             try:
-                final_attack_idx = int(tf.argmax(final_pred['attack_type'][0]).numpy())
-                if final_attack_idx >= len(attack_types):
-                    final_attack_idx = 0
-                final_attack = attack_types[final_attack_idx]
-                
-                threat_binary_val = final_pred['threat_binary'][0][0].numpy()
-                threat_detected = float(threat_binary_val) > 0.5
-                
-                confidence_val = final_pred['confidence'][0][0].numpy()
-                confidence = float(confidence_val)
+                return self._trm_result(outputs, attack_types)
             except Exception as e:
                 logger.error(f"Error extracting TRM predictions: {e}")
                 return {
@@ -296,25 +487,6 @@ class CyberSentinel:
                     'error': str(e),
                     'model_used': 'TRM'
                 }
-            
-            if threat_detected:
-                severity = self.threat_intel['severity_map'].get(final_attack, 'HIGH')
-                action = self.threat_intel['action_recommendations'].get(final_attack, 'Investigate')
-                return {
-                    'threat_detected': True,
-                    'attack_type': final_attack,
-                    'confidence': confidence,
-                    'severity': severity,
-                    'recommended_action': action,
-                    'model_used': 'TRM'
-                }
-            else:
-                return {
-                    'threat_detected': False,
-                    'confidence': confidence,
-                    'status': 'Normal',
-                    'model_used': 'TRM'
-                }
         except Exception as e:
             logger.error(f"TRM assessment error: {e}")
             logger.exception("TRM assessment traceback:")
@@ -326,6 +498,63 @@ class CyberSentinel:
                 'model_used': 'TRM'
             }
 
+    def _trm_result(self, outputs, attack_types):
+        """Build the assessment dict from one [attack_idx, threat_binary, confidence] row"""
+        final_attack_idx = int(outputs[0])
+        if final_attack_idx >= len(attack_types):
+            final_attack_idx = 0
+        final_attack = attack_types[final_attack_idx]
+        
+        threat_detected = float(outputs[1]) > 0.5
+        confidence = float(outputs[2])
+        
+        if threat_detected:
+            return {
+                'threat_detected': True,
+                'attack_type': final_attack,
+                'confidence': confidence,
+                'severity': self._severity_by_idx[final_attack_idx],
+                'recommended_action': self._action_by_idx[final_attack_idx],
+                'model_used': 'TRM'
+            }
+        else:
+            return {
+                'threat_detected': False,
+                'confidence': confidence,
+                'status': 'Normal',
+                'model_used': 'TRM'
+            }
+    
+    def _trm_results(self, outputs):
+        """Build assessment dicts for an (N, 3) block of TRM outputs"""
+        attack_idx = outputs[:, 0].astype(np.intp)
+        attack_idx[(attack_idx < 0) | (attack_idx >= len(ATTACK_TYPES))] = 0
+        threats = (outputs[:, 1] > 0.5).tolist()
+        confidences = outputs[:, 2].astype(float).tolist()
+        attacks = np.take(np.array(ATTACK_TYPES, dtype=object), attack_idx)
+        severities = np.take(self._severity_by_idx, attack_idx)
+        actions = np.take(self._action_by_idx, attack_idx)
+        
+        results = []
+        for i, threat_detected in enumerate(threats):
+            if threat_detected:
+                results.append({
+                    'threat_detected': True,
+                    'attack_type': attacks[i],
+                    'confidence': confidences[i],
+                    'severity': severities[i],
+                    'recommended_action': actions[i],
+                    'model_used': 'TRM'
+                })
+            else:
+                results.append({
+                    'threat_detected': False,
+                    'confidence': confidences[i],
+                    'status': 'Normal',
+                    'model_used': 'TRM'
+                })
+        return results
+    
     def _ensemble_assessment(self, features, attack_types):
         try:
             # Ensure features is in the right format
@@ -346,54 +575,242 @@ class CyberSentinel:
                 else:
                     features_array = features_array[:, :len(self.feature_names)]
             
-            proba = self.ensemble_model.predict_proba(features_array)[0]
-            prediction = int(np.argmax(proba))
-            confidence = float(np.max(proba))
-            
-            if prediction == 1:
-                return {
-                    'threat_detected': True,
-                    'attack_type': 'Generic',
-                    'confidence': confidence,
-                    'severity': 'HIGH',
-                    'recommended_action': 'General investigation required',
-                    'model_used': 'Ensemble'
-                }
-            else:
-                return {
-                    'threat_detected': False,
-                    'confidence': confidence,
-                    'status': 'Normal',
-                    'model_used': 'Ensemble'
-                }
+            if self._ensemble_scorers is None:
+                self._ensemble_scorers = self._make_ensemble_scorers()
+            proba = np.mean([score(features_array) for score in self._ensemble_scorers], axis=0)[0]
+            return self._ensemble_result(proba)
         except Exception as e:
             logger.error(f"Ensemble assessment error: {e}")
             logger.exception("Ensemble assessment traceback:")
+            return self._ensemble_error(e)
+    
+    @staticmethod
+    def _ensemble_result(proba):
+        """Build the assessment dict from one row of averaged class probabilities"""
+        prediction = int(np.argmax(proba))
+        confidence = float(np.max(proba))
+        
+        if prediction == 1:
+            return {
+                'threat_detected': True,
+                'attack_type': 'Generic',
+                'confidence': confidence,
+                'severity': 'HIGH',
+                'recommended_action': 'General investigation required',
+                'model_used': 'Ensemble'
+            }
+        else:
             return {
                 'threat_detected': False,
-                'confidence': 0.5,
-                'status': 'Unknown',
-                'error': str(e),
-                'model_used': 'Fallback'
+                'confidence': confidence,
+                'status': 'Normal',
+                'model_used': 'Ensemble'
             }
+    
+    @staticmethod
+    def _ensemble_error(error):
+        return {
+            'threat_detected': False,
+            'confidence': 0.5,
+            'status': 'Unknown',
+            'error': str(error),
+            'model_used': 'Fallback'
+        }
+    
+    def _prepare_features(self, features):
+        """One event's features as a float32 vector of the trained length, or an error dict"""
+        # Convert features to proper format
+        try:
+            if isinstance(features, dict):
+                # If features is a dict, try to extract a list/array
+                if 'features' in features:
+                    features = features['features']
+                elif len(features) > 0:
+                    # Try to convert dict values to list
+                    features = list(features.values())
+                else:
+                    return {"error": "Invalid features format: empty dict"}
+            
+            # Ensure features is a list or array
+            if not isinstance(features, (list, tuple, np.ndarray)):
+                return {"error": f"Features must be list, tuple, or array, got {type(features)}"}
+            
+            # Convert to numpy array and ensure it's 1D
+            features_array = np.asarray(features, dtype=np.float32)
+            if features_array.ndim == 0:
+                return {"error": "Features cannot be a scalar"}
+            features_array = features_array.ravel()
+            
+            # Check feature count matches; pad with zeros or truncate if not
+            expected_features = len(self.feature_names)
+            if features_array.size != expected_features:
+                logger.warning(f"Feature count mismatch: got {features_array.size}, expected {expected_features}")
+            return _fit_features(features_array, expected_features)
+        
+        except Exception as e:
+            logger.error(f"Error processing features: {e}")
+            return {"error": f"Feature processing failed: {str(e)}"}
+    
+    def assess_threat_batch(self, features_batch, use_trm=True):
+        """Assess many feature vectors with one model call; returns one dict per row
+        
+        features_batch is an (N, D) array or a sequence of 1-D feature vectors;
+        rows are zero-padded or truncated to the trained feature count.
+        """
+        if not self.is_trained:
+            return [{"error": "Model not trained"} for _ in range(len(features_batch))]
+        
+        expected_features = len(self.feature_names)
+        if isinstance(features_batch, np.ndarray) and features_batch.ndim == 2:
+            features_matrix = features_batch.astype(np.float32, copy=False)
+            if features_matrix.shape[1] != expected_features:
+                logger.warning(f"Feature count mismatch: got {features_matrix.shape[1]}, expected {expected_features}")
+                fitted = np.zeros((features_matrix.shape[0], expected_features), np.float32)
+                m = min(features_matrix.shape[1], expected_features)
+                fitted[:, :m] = features_matrix[:, :m]
+                features_matrix = fitted
+            return self._score_matrix(features_matrix, use_trm)
+        
+        # Rows are validated one by one, like assess_threat: a malformed event
+        # gets its own error dict instead of failing the whole batch
+        results = [None] * len(features_batch)
+        rows = []
+        for i, features in enumerate(features_batch):
+            prepared = self._prepare_features(features)
+            if isinstance(prepared, dict):
+                results[i] = prepared
+            else:
+                rows.append((i, prepared))
+        if rows:
+            scored = self._score_matrix(np.stack([row for _, row in rows]), use_trm)
+            for (i, _), result in zip(rows, scored):
+                results[i] = result
+        return results
+    
+    def _score_matrix(self, features_matrix, use_trm):
+        """Score an (N, D) float32 matrix with one model call; one dict per row"""
+        if use_trm and self.trm_model:
+            try:
+                if self._predict_fn is None:
+                    self._predict_fn = self._make_predict_fn()
+                outputs = np.asarray(self._predict_fn(features_matrix))
+            except Exception as e:
+                logger.error(f"TRM batch prediction error: {e}")
+                error = {'threat_detected': False, 'confidence': 0.0, 'status': 'Error',
+                         'error': str(e), 'model_used': 'TRM'}
+                return [dict(error) for _ in range(len(features_matrix))]
+            return self._trm_results(outputs)
+        
+        try:
+            if self._ensemble_scorers is None:
+                self._ensemble_scorers = self._make_ensemble_scorers()
+            proba = np.mean([score(features_matrix) for score in self._ensemble_scorers], axis=0)
+        except Exception as e:
+            logger.error(f"Ensemble batch assessment error: {e}")
+            return [self._ensemble_error(e) for _ in range(len(features_matrix))]
+        return [self._ensemble_result(row) for row in proba]
+
+class AssessmentBatcher:
+    """Coalesce concurrent single-event assessments into assess_threat_batch calls
+    
+    Callers block in assess() while a worker thread gathers requests for up to
+    window_ms (or max_batch requests) and scores them with one model call.
+    """
+    
+    def __init__(self, sentinel, max_batch=64, window_ms=2.0, use_trm=True):
+        self.sentinel = sentinel
+        self.max_batch = max_batch
+        self.window = window_ms / 1000.0
+        self.use_trm = use_trm
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="assessment-batcher", daemon=True)
+        self._worker.start()
+    
+    def submit(self, features):
+        """Queue one feature vector; returns a Future for its assessment dict"""
+        future = Future()
+        self._queue.put((features, future))
+        return future
+    
+    def assess(self, features, timeout=None):
+        """Assess one feature vector as part of the next batch"""
+        return self.submit(features).result(timeout)
+    
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            # Callers may have cancelled while queued; those are dropped here, and
+            # the rest can no longer be cancelled once marked running
+            batch = [(features, future) for features, future in batch
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            
+            # Nothing may escape this loop: a dead worker would leave every later
+            # assess() call blocked forever
+            try:
+                results = self.sentinel.assess_threat_batch(
+                    [features for features, _ in batch], use_trm=self.use_trm
+                )
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                logger.error(f"Batched assessment error: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
 
 # ---------------- Data Loader ----------------
 class UNB15DataLoader:
     def __init__(self, data_path):
         self.data_path = data_path
     
+    # Low-cardinality string columns; category dtype keeps them compact
+    CATEGORICAL_DTYPES = {'proto': 'category', 'service': 'category', 'state': 'category'}
+    
     def load_datasets(self):
         try:
-            train_df = pd.read_csv(f"{self.data_path}/UNSW_NB15_training-set.csv")
-            test_df = pd.read_csv(f"{self.data_path}/UNSW_NB15_testing-set.csv")
+            train_df = self._read_dataset("UNSW_NB15_training-set")
+            test_df = self._read_dataset("UNSW_NB15_testing-set")
             logger.info("✅ Loaded UNSW-NB15 datasets")
             return train_df, test_df
         except Exception as e:
             logger.warning(f"Could not load datasets: {e}. Creating sample data...")
             return self._create_sample_data()
     
+    def _read_dataset(self, name):
+        """Read one split, from a parquet cache next to the CSV when it is up to date"""
+        csv_path = os.path.join(self.data_path, f"{name}.csv")
+        parquet_path = os.path.join(self.data_path, f"{name}.parquet")
+        if os.path.exists(parquet_path) and (
+            not os.path.exists(csv_path) or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+        ):
+            return pd.read_parquet(parquet_path)
+        
+        try:
+            # Multi-threaded Arrow CSV parser when pyarrow is installed
+            df = pd.read_csv(csv_path, engine='pyarrow', dtype=self.CATEGORICAL_DTYPES)
+        except (ImportError, ValueError):
+            df = pd.read_csv(csv_path, dtype=self.CATEGORICAL_DTYPES)
+        
+        try:
+            df.to_parquet(parquet_path, compression='zstd')
+        except Exception as e:
+            logger.warning(f"Could not write parquet cache {parquet_path}: {e}")
+        return df
+    
     def _create_sample_data(self):
-        np.random.seed(42)
+        rng = np.random.default_rng(42)
         n_samples = 5000
         feature_names = ['dur','proto','service','state','spkts','dpkts','sbytes','dbytes',
                          'rate','sttl','dttl','sload','dload','sloss','dloss','sinpkt','dinpkt',
@@ -401,17 +818,27 @@ class UNB15DataLoader:
                          'smean','dmean','trans_depth','response_body_len','ct_srv_src','ct_state_ttl',
                          'ct_dst_ltm','ct_src_dport_ltm','ct_dst_sport_ltm','ct_dst_src_ltm','is_ftp_login',
                          'ct_ftp_cmd','ct_flw_http_mthd','ct_src_ltm','ct_srv_dst','is_sm_ips_ports']
-        data = {}
-        for feature in feature_names:
-            if feature in ['proto', 'service', 'state']:
-                data[feature] = np.random.choice(['tcp','udp','icmp'] if feature=='proto' else ['http','ftp','ssh','dns','-'] if feature=='service' else ['FIN','CON','INT','REQ'], n_samples)
-            else:
-                data[feature] = np.random.exponential(1.0, n_samples)
-        df = pd.DataFrame(data)
+        categorical_values = {
+            'proto': ['tcp','udp','icmp'],
+            'service': ['http','ftp','ssh','dns','-'],
+            'state': ['FIN','CON','INT','REQ']
+        }
+        numeric_features = [f for f in feature_names if f not in categorical_values]
+        
+        # All numeric columns from one PRNG call into a single matrix
+        df = pd.DataFrame(
+            rng.exponential(1.0, size=(n_samples, len(numeric_features))).astype(np.float32),
+            columns=numeric_features
+        )
+        for feature, values in categorical_values.items():
+            df[feature] = rng.choice(values, n_samples)
+        df = df[feature_names]
+        
         attack_types = ['Normal', 'Generic', 'Exploits', 'Fuzzers', 'DoS', 'Reconnaissance', 'Analysis', 'Backdoor', 'Shellcode', 'Worms']
         attack_probs = [0.7,0.05,0.05,0.05,0.04,0.04,0.03,0.02,0.01,0.01]
-        df['attack_cat'] = np.random.choice(attack_types, n_samples, p=attack_probs)
-        df['label'] = (df['attack_cat'] != 'Normal').astype(int)
+        attack_codes = rng.choice(len(attack_types), n_samples, p=attack_probs)
+        df['attack_cat'] = np.asarray(attack_types)[attack_codes]
+        df['label'] = (attack_codes != 0).astype(np.int8)  # code 0 is Normal
         train_df = df[:4000]
         test_df = df[4000:]
         logger.info("✅ Created sample dataset")
@@ -419,28 +846,54 @@ class UNB15DataLoader:
 
 # ---------------- Preprocessor ----------------
 class CyberDataPreprocessor:
+    CATEGORICAL_COLS = ['proto', 'service', 'state']
+    
     def __init__(self):
         self.scaler = None
-        self.label_encoders = {}
+        self.category_levels = {}
+        self.numeric_cols = None
+        self.feature_names = None
+    
+    def _encode_categoricals(self, df, categorical_cols, fitting):
+        """Ordinal-encode all categorical columns into one (N, C) code matrix
+        
+        Codes are computed in C by pandas, in the smallest int dtype that fits
+        (int8 for the UNSW-NB15 columns); values unseen at fit time become -1.
+        """
+        if fitting:
+            self.category_levels = {col: pd.Categorical(df[col]).categories
+                                    for col in categorical_cols}
+        return np.column_stack([
+            pd.Categorical(df[col], categories=self.category_levels[col]).codes
+            for col in categorical_cols
+        ])
     
     def preprocess_data(self, df):
-        data = df.copy()
-        categorical_cols = ['proto','service','state']
-        for col in categorical_cols:
-            if col in data.columns:
-                from sklearn.preprocessing import LabelEncoder
-                self.label_encoders[col] = LabelEncoder()
-                data[col] = self.label_encoders[col].fit_transform(data[col].astype(str))
-        numeric_cols = data.select_dtypes(include=[np.number]).columns
-        numeric_cols = [c for c in numeric_cols if c not in ['label','attack_cat']]
-        from sklearn.preprocessing import StandardScaler
-        if not self.scaler:
-            self.scaler = StandardScaler()
-            X_scaled = self.scaler.fit_transform(data[numeric_cols])
+        # df is only read: the feature matrix is assembled from fresh arrays, so
+        # the caller's frame is never copied or modified
+        fitting = self.scaler is None
+        categorical_cols = [c for c in self.CATEGORICAL_COLS if c in df.columns]
+        if fitting:
+            numeric_cols = df.select_dtypes(include=[np.number]).columns
+            self.numeric_cols = [c for c in numeric_cols if c not in ['label','attack_cat'] + categorical_cols]
+            self.feature_names = categorical_cols + self.numeric_cols
+        
+        blocks = []
+        if categorical_cols:
+            blocks.append(self._encode_categoricals(df, categorical_cols, fitting).astype(np.float32))
+        blocks.append(df[self.numeric_cols].to_numpy(np.float32, copy=False))
+        X = np.hstack(blocks)
+        
+        # Categorical codes are standardized like the numeric columns. X is a fresh
+        # float32 buffer, so it is scaled in place and stays float32 throughout
+        if fitting:
+            self.scaler = StandardScaler(copy=False)
+            X_scaled = self.scaler.fit_transform(X)
         else:
-            X_scaled = self.scaler.transform(data[numeric_cols])
-        y_binary = data['label']
-        y_attack = data['attack_cat']
-        feature_names = numeric_cols
+            X_scaled = self.scaler.transform(X)
+        X_scaled = X_scaled.astype(np.float32, copy=False)
+        y_binary = df['label']
+        y_attack = df['attack_cat']
+        feature_names = self.feature_names
         logger.info(f"✅ Preprocessed data: {X_scaled.shape[0]} samples, {len(feature_names)} features")
-        return X_scaled, y_binary, y_attack, feature_names
\ No newline at end of file
+        return X_scaled, y_binary, y_attack, feature_names
@@ -20,8 +20,13 @@ Usage:
 """
 
 import os
+import sys
 import logging
-from typing import Dict, Optional, Any
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 
 import numpy as np
@@ -36,6 +41,31 @@ except Exception:
     tf = None
     load_model = None
 
+# ONNX Runtime serves the model when available; tf2onnx converts the .h5 once
+try:
+    import onnxruntime as ort
+except Exception:
+    ort = None
+
+try:
+    import tf2onnx
+except Exception:
+    tf2onnx = None
+
+try:
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+except Exception:
+    quantize_dynamic = None
+
+# Distinct feature vectors whose model outputs predict_ml keeps
+PREDICTION_CACHE_SIZE = 2048
+
+# Batches at least this large go to the CUDA session, when one is available
+GPU_MIN_BATCH = 64
+
+# Largest share of top-1 disagreements with the float model the int8 model may show
+QUANT_MAX_DISAGREEMENT = 0.02
+
 # Import port scan detector (assumes port_scan_detector.py present)
 try:
     from port_scan_detector import PortScanDetector
@@ -45,10 +75,147 @@ except Exception:
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Map protocol to numeric (common CICIDS2017 encoding); the upper-case spellings
+# senders commonly use are included so they resolve without lower-casing
+_PROTOCOL_MAP = {sys.intern(name): code for name, code in (
+    ('tcp', 0), ('udp', 1), ('icmp', 2), ('TCP', 0), ('UDP', 1), ('ICMP', 2))}
+_PROTOCOL_IDX = 1
+# Predicted labels that count as normal traffic
+_BENIGN_SET = frozenset({'BENIGN', 'NORMAL', '0', 'NONE'})
+
+# Attack type (upper-case) -> severity level. Severities stay strings: results
+# are JSON for the web app and model server clients, which count them by name
+_SEVERITY_MAP = {
+    'BENIGN': 'NONE',
+    'NORMAL': 'NONE',
+    'DOS': 'HIGH',
+    'DDOS': 'HIGH',
+    'PORTSCAN': 'MEDIUM',
+    'PORT_SCAN': 'MEDIUM',
+    'BOT': 'HIGH',
+    'INFILTRATION': 'CRITICAL',
+    'WEBATTACK': 'HIGH',
+    'WEB_ATTACK': 'HIGH',
+    'FTP-PATATOR': 'MEDIUM',
+    'SSH-PATATOR': 'MEDIUM',
+    'BRUTEFORCE': 'HIGH',
+    'BRUTE_FORCE': 'HIGH',
+    'HEARTBLEED': 'CRITICAL',
+    'EXPLOITS': 'HIGH',
+    'BACKDOOR': 'CRITICAL',
+    'SHELLCODE': 'CRITICAL',
+    'WORMS': 'CRITICAL',
+    'ANALYSIS': 'MEDIUM',
+    'FUZZERS': 'MEDIUM',
+    'RECONNAISSANCE': 'MEDIUM',
+    'GENERIC': 'MEDIUM'
+}
+
+# Default marker for byte counts that fall back to the packet size
+_PACKET_SIZE = object()
+
+
+@lru_cache(maxsize=256)
+def _label_info(label: str) -> Tuple[bool, str]:
+    """(is_benign, severity) for a model label; the encoder only ever yields a
+    handful of labels, so each is upper-cased and looked up once"""
+    upper = label.upper()
+    return upper in _BENIGN_SET, _SEVERITY_MAP.get(upper, 'MEDIUM')
+
+
+# (epoch second, 'YYYY-MM-DDTHH:MM:SS') of the last formatted timestamp, swapped
+# as one tuple so concurrent callers never pair a second with another's string
+_iso_second = (None, '')
+
+
+def _utc_isoformat() -> str:
+    """Current UTC time as ISO-8601 with microseconds, like datetime.utcnow().isoformat()
+
+    The date/time part is formatted once per second and reused for every packet
+    seen within that second.
+    """
+    global _iso_second
+    sec, us = divmod(time.time_ns() // 1000, 1_000_000)
+    cached_sec, prefix = _iso_second
+    if sec != cached_sec:
+        prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(sec))
+        _iso_second = (sec, prefix)
+    return f"{prefix}.{us:06d}"
+
+
+def _protocol_num(protocol) -> int:
+    """CICIDS2017 protocol code; common spellings resolve without lower-casing"""
+    protocol_num = _PROTOCOL_MAP.get(protocol) if isinstance(protocol, str) else None
+    if protocol_num is None:
+        protocol_num = _PROTOCOL_MAP.get(str(protocol).lower(), 0)
+    return protocol_num
+
+
+def _safe_float(value, default=0.0):
+    try:
+        return float(value) if value is not None else default
+    except (ValueError, TypeError):
+        return default
+
+
+def _safe_int(value, default=0):
+    try:
+        return int(value) if value is not None else default
+    except (ValueError, TypeError):
+        return default
+
+
+def _is_stale(path: str, source: str) -> bool:
+    """True if the derived file at path is missing or older than its source."""
+    if not os.path.exists(path):
+        return True
+    return os.path.exists(source) and os.path.getmtime(source) > os.path.getmtime(path)
+
+
+def _build_atomic(path: str, build) -> None:
+    """Run build(tmp_path) and rename the result over path.
+
+    The temp name is per-process, so concurrent builders never share a partial
+    file and readers only ever see a complete one.
+    """
+    root, ext = os.path.splitext(path)
+    tmp_path = f'{root}.{os.getpid()}.tmp{ext}'
+    try:
+        build(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
 
 class CyberSentinelMod:
     """Central IDS engine that combines ML + Behavioral detection."""
 
+    # Packet fields in CICIDS2017 feature order, as (key, default).
+    # Note: This is a generic mapping. Adjust the order based on your specific model.
+    _FEATURE_SPEC = (
+        # Basic flow features
+        ('duration', 0.0), ('protocol', 0.0), ('service', 0.0), ('state', 0.0),
+        # Packet and byte counts
+        ('spkts', 1.0), ('dpkts', 1.0), ('sbytes', _PACKET_SIZE), ('dbytes', _PACKET_SIZE),
+        # Rate, TTL, load and loss
+        ('rate', 0.0), ('sttl', 64.0), ('dttl', 64.0), ('sload', 0.0), ('dload', 0.0),
+        ('sloss', 0.0), ('dloss', 0.0),
+        # Inter-packet timing, jitter and window size
+        ('sinpkt', 0.0), ('dinpkt', 0.0), ('sjit', 0.0), ('djit', 0.0),
+        ('swin', 0.0), ('dwin', 0.0),
+        # TCP base sequence numbers and RTT
+        ('stcpb', 0.0), ('dtcpb', 0.0), ('tcprtt', 0.0), ('synack', 0.0), ('ackdat', 0.0),
+        # Means and connection features
+        ('smean', 0.0), ('dmean', 0.0), ('trans_depth', 0.0), ('response_body_len', 0.0),
+        # Connection state features (ct_*)
+        ('ct_srv_src', 0.0), ('ct_state_ttl', 0.0), ('ct_dst_ltm', 0.0),
+        ('ct_src_dport_ltm', 0.0), ('ct_dst_sport_ltm', 0.0), ('ct_dst_src_ltm', 0.0),
+        # FTP and HTTP features
+        ('is_ftp_login', 0.0), ('ct_ftp_cmd', 0.0), ('ct_flw_http_mthd', 0.0),
+        ('ct_src_ltm', 0.0), ('ct_srv_dst', 0.0), ('is_sm_ips_ports', 0.0),
+    )
+
     def __init__(self,
                  model_path: str = "models/CICIDS2017_5class_model.h5",
                  scaler_path: str = "models/scaler.pkl",
@@ -59,15 +226,49 @@ class CyberSentinelMod:
         self.encoder_path = encoder_path
 
         self.model = None
+        self.ort_session = None
+        self.in_name = None
+        self.out_name = None
+        # Throughput session on CUDA for large analyze_packets batches (float model)
+        self._gpu_session = None
+        # Concrete tf.function over the Keras model, used when ONNX Runtime is not
+        self._infer = None
+        # Persistent ORT input buffer and binding per thread, so model server
+        # client threads run the session concurrently without sharing a buffer
+        self._ort_local = threading.local()
         self.scaler = None
+        # StandardScaler parameters as float32, applied in place per packet
+        self._mean = None
+        self._inv_scale = None
         self.encoder = None
+        # Model outputs keyed by the scaled feature bytes; repeated flows in a
+        # scan or flood skip inference (LRU, PREDICTION_CACHE_SIZE entries)
+        self._pred_cache = OrderedDict()
+        self._pred_cache_lock = threading.Lock()
 
         self.port_scan_detector = PortScanDetector(window_size=port_scan_window) if PortScanDetector else None
 
         # load artifacts if available
         self._load_artifacts()
 
+        # If scaler exists, infer expected feature length from scaler.mean_;
+        # default to 79 features (standard CICIDS2017)
+        if self.scaler is not None and hasattr(self.scaler, 'mean_'):
+            self._n_features = len(self.scaler.mean_)
+        else:
+            self._n_features = 79
+        # Features past _FEATURE_SPEC, split by index parity
+        n_fixed = min(len(self._FEATURE_SPEC), self._n_features)
+        self._tail_even = slice(n_fixed + n_fixed % 2, self._n_features, 2)
+        self._tail_odd = slice(n_fixed + (n_fixed + 1) % 2, self._n_features, 2)
+        # Protocol is mapped separately, so it is left out of the generic fill
+        self._spec = tuple((i, key, default)
+                           for i, (key, default) in enumerate(self._FEATURE_SPEC[:self._n_features])
+                           if i != _PROTOCOL_IDX)
+
     def _load_artifacts(self):
+        self._pred_cache.clear()
+
         # Helper to resolve paths (try relative, then absolute)
         def resolve_path(path):
             if os.path.isabs(path):
@@ -82,13 +283,24 @@ class CyberSentinelMod:
                 return abs_path
             return path
         
+        # Get actual model name from file path
+        # (e.g., "models/CICIDS2017_5class_model.h5" -> "CICIDS2017_5class_model")
+        self._model_name = 'CICIDS2017_5class_model'
+        if self.model_path:
+            base_name = os.path.basename(self.model_path)
+            self._model_name = base_name[:-3] if base_name.endswith('.h5') else base_name
+        self._recommendation_template = (
+            f'{self._model_name} detected {{}}. Investigate and apply IDS policy based on attack type.')
+
         model_path = resolve_path(self.model_path)
         scaler_path = resolve_path(self.scaler_path)
         encoder_path = resolve_path(self.encoder_path)
         
-        # Load Keras model
+        # Load Keras model (not needed when an up-to-date ONNX export can be served)
         try:
-            if load_model is None:
+            if ort is not None and not _is_stale(os.path.splitext(model_path)[0] + '.onnx', model_path):
+                self.model = None
+            elif load_model is None:
                 logger.warning("TensorFlow/Keras not available; ML model disabled")
                 self.model = None
             elif not os.path.exists(model_path):
@@ -114,11 +326,22 @@ class CyberSentinelMod:
             logger.exception("Unexpected error traceback:")
             self.model = None
 
+        self._load_onnx_session(model_path)
+        self._infer = self._trace_keras_model() if self.ort_session is None else None
+
         # Load scaler
         try:
             if os.path.exists(scaler_path):
                 self.scaler = joblib.load(scaler_path)
                 logger.info(f"✅ Loaded scaler from {scaler_path}")
+                mean = getattr(self.scaler, 'mean_', None)
+                scale = getattr(self.scaler, 'scale_', None)
+                if mean is not None:
+                    self._mean = np.asarray(mean, dtype=np.float32)
+                    if not getattr(self.scaler, 'with_mean', True):
+                        self._mean = np.zeros_like(self._mean)
+                    self._inv_scale = (np.ones_like(self._mean) if scale is None
+                                       else np.asarray(1.0 / scale, dtype=np.float32))
             else:
                 logger.warning(f"Scaler file not found at {scaler_path} (tried: {self.scaler_path}); scaling disabled")
         except Exception as e:
@@ -136,6 +359,155 @@ class CyberSentinelMod:
             logger.error(f"Failed to load label encoder: {e}")
             self.encoder = None
 
+    def _load_onnx_session(self, model_path: str):
+        """Serve the model through ONNX Runtime, exporting the Keras model on first run.
+
+        The export is cached next to the .h5 file and redone when the .h5 is newer.
+        Without onnxruntime, or if the export fails, predict_ml keeps using the
+        Keras model.
+        """
+        if ort is None:
+            return
+        onnx_path = os.path.splitext(model_path)[0] + '.onnx'
+        try:
+            if _is_stale(onnx_path, model_path):
+                if self.model is not None and tf2onnx is not None:
+                    spec = (tf.TensorSpec((None,) + tuple(self.model.input_shape[1:]), tf.float32, name='input'),)
+                    _build_atomic(onnx_path, lambda tmp: tf2onnx.convert.from_keras(
+                        self.model, input_signature=spec, opset=15, output_path=tmp))
+                    logger.info(f"✅ Exported ONNX model to {onnx_path}")
+                elif self.model is None and os.path.exists(onnx_path):
+                    logger.warning(f"{onnx_path} is older than {model_path} but the Keras model could not "
+                                   f"be loaded to re-export it; serving the stale export")
+                else:
+                    return
+
+            self.ort_session = self._make_ort_session(onnx_path)
+            self.in_name = self.ort_session.get_inputs()[0].name
+            self.out_name = self.ort_session.get_outputs()[0].name
+            logger.info(f"✅ Loaded ONNX Runtime session from {onnx_path}")
+            self._load_gpu_session(onnx_path)
+            self._load_quantized_session(onnx_path)
+        except Exception as e:
+            logger.warning(f"ONNX Runtime unavailable for {onnx_path}: {e}; using Keras model")
+            self.ort_session = None
+            if self.model is None and load_model is not None and os.path.exists(model_path):
+                self.model = load_model(model_path, compile=False)
+
+    def _trace_keras_model(self):
+        """Trace the Keras model once into a concrete inference function.
+
+        Calling the concrete function skips model.predict's data adapter and
+        per-call dispatch, which dominate the cost for one-packet batches.
+        Returns None (predict_ml then uses model.predict) if tracing fails.
+        """
+        if self.model is None:
+            return None
+        try:
+            model = self.model
+            spec = tf.TensorSpec((None,) + tuple(model.input_shape[1:]), tf.float32)
+
+            @tf.function(input_signature=[spec])
+            def infer(x):
+                return model(x, training=False)
+
+            return infer.get_concrete_function()
+        except Exception as e:
+            logger.warning(f"Could not trace Keras model for inference: {e}; using model.predict")
+            return None
+
+    @staticmethod
+    def _make_ort_session(path: str):
+        so = ort.SessionOptions()
+        so.intra_op_num_threads = 1
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return ort.InferenceSession(path, sess_options=so, providers=['CPUExecutionProvider'])
+
+    def _load_gpu_session(self, onnx_path: str):
+        """Open a CUDA session for batched inference if onnxruntime-gpu can use a GPU.
+
+        Set CYBER_SENTINEL_USE_GPU=0 to keep everything on the CPU. Single packets
+        always stay on the CPU session, where batch-1 latency is lower.
+        """
+        if os.environ.get('CYBER_SENTINEL_USE_GPU', '1') != '1':
+            return
+        if 'CUDAExecutionProvider' not in ort.get_available_providers():
+            return
+        try:
+            so = ort.SessionOptions()
+            so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            session = ort.InferenceSession(onnx_path, sess_options=so,
+                                           providers=['CUDAExecutionProvider', 'CPUExecutionProvider'])
+            if 'CUDAExecutionProvider' not in session.get_providers():
+                return
+            self._gpu_session = session
+            logger.info(f"✅ Loaded CUDA ONNX Runtime session for batches of {GPU_MIN_BATCH}+ packets")
+        except Exception as e:
+            logger.warning(f"CUDA ONNX Runtime session unavailable: {e}; batches stay on CPU")
+
+    def _load_quantized_session(self, onnx_path: str):
+        """Swap in a dynamically quantized int8 model if it agrees with the float one.
+
+        The int8 model is built next to the float export and rebuilt whenever the
+        export is newer. It is compared with the float model on a fixed batch of
+        standardized inputs and is only used if at most QUANT_MAX_DISAGREEMENT of
+        the top-1 predictions differ.
+        """
+        if quantize_dynamic is None:
+            return
+        int8_path = os.path.splitext(onnx_path)[0] + '.int8.onnx'
+        try:
+            if _is_stale(int8_path, onnx_path):
+                _build_atomic(int8_path, lambda tmp: quantize_dynamic(
+                    onnx_path, tmp, weight_type=QuantType.QInt8, op_types_to_quantize=['MatMul', 'Gemm']))
+                logger.info(f"✅ Quantized ONNX model to {int8_path}")
+            int8_session = self._make_ort_session(int8_path)
+
+            n_features = self.ort_session.get_inputs()[0].shape[1]
+            if not isinstance(n_features, int):
+                logger.warning("ONNX model has no fixed feature count; skipping int8 validation and model")
+                return
+            X = np.random.default_rng(0).standard_normal((256, n_features)).astype(np.float32)
+            ref = self.ort_session.run([self.out_name], {self.in_name: X})[0]
+            q = int8_session.run([int8_session.get_outputs()[0].name],
+                                 {int8_session.get_inputs()[0].name: X})[0]
+            if ref.ndim == 2 and ref.shape[1] > 1:
+                disagreement = float(np.mean(ref.argmax(axis=1) != q.argmax(axis=1)))
+            else:
+                disagreement = float(np.mean((ref.ravel() >= 0.5) != (q.ravel() >= 0.5)))
+            if disagreement > QUANT_MAX_DISAGREEMENT:
+                logger.warning(f"int8 model disagrees on {disagreement:.1%} of validation inputs; "
+                               f"keeping float model")
+                return
+
+            self.ort_session = int8_session
+            self.in_name = int8_session.get_inputs()[0].name
+            self.out_name = int8_session.get_outputs()[0].name
+            logger.info(f"✅ Using int8 ONNX model ({disagreement:.1%} top-1 disagreement)")
+        except Exception as e:
+            logger.warning(f"int8 quantization unavailable for {onnx_path}: {e}; keeping float model")
+
+    def _bind_io(self, n_features: int):
+        """(Re)bind this thread's persistent (1, n_features) input buffer to the ORT session."""
+        local = self._ort_local
+        local.in_buf = np.zeros((1, n_features), dtype=np.float32)
+        io = self.ort_session.io_binding()
+        io.bind_input(self.in_name, 'cpu', 0, np.float32, local.in_buf.shape, local.in_buf.ctypes.data)
+        io.bind_output(self.out_name)
+        local.io = io
+        local.session = self.ort_session
+
+    def _run_ort(self, fv: np.ndarray) -> np.ndarray:
+        """Run one feature vector through the bound session without per-call allocations."""
+        local = self._ort_local
+        in_buf = getattr(local, 'in_buf', None)
+        if in_buf is None or in_buf.shape[1] != fv.shape[0] or local.session is not self.ort_session:
+            self._bind_io(fv.shape[0])
+            in_buf = local.in_buf
+        in_buf[0] = fv
+        local.session.run_with_iobinding(local.io)
+        return local.io.copy_outputs_to_cpu()[0]
+
     # ---------------------- Feature extraction ----------------------
     def preprocess_packet(self, packet: Dict[str, Any]) -> np.ndarray:
         """Convert incoming packet dict into feature vector compatible with CICIDS2017 model.
@@ -144,307 +516,159 @@ class CyberSentinelMod:
         approximately 79 features. This function extracts available features and fills
         missing ones with default values.
         """
-        # If scaler exists, infer expected feature length from scaler.mean_
-        if self.scaler is not None and hasattr(self.scaler, 'mean_'):
-            n_features = len(self.scaler.mean_)
-        else:
-            # default to 79 features (standard CICIDS2017)
-            n_features = 79
-
-        fv = np.zeros(n_features, dtype=np.float32)
-
-        # Helper functions for feature extraction
-        def safe_float(value, default=0.0):
-            try:
-                return float(value) if value is not None else default
-            except (ValueError, TypeError):
-                return default
-
-        def safe_int(value, default=0):
-            try:
-                return int(value) if value is not None else default
-            except (ValueError, TypeError):
-                return default
-
-        # Extract basic packet information
-        protocol = str(packet.get('protocol', 'tcp')).lower()
-        src_port = safe_int(packet.get('src_port', 0))
-        dst_port = safe_int(packet.get('dst_port', 0))
-        duration = safe_float(packet.get('duration', 0.0))
-        packet_size = safe_float(packet.get('packet_size', 0.0))
-        flags = safe_int(packet.get('flags', 0))
-        
-        # Extract IP addresses for flow-based features
-        srcip = packet.get('srcip', '0.0.0.0')
-        dstip = packet.get('dstip', '0.0.0.0')
-        
-        # Map protocol to numeric (common CICIDS2017 encoding)
-        protocol_map = {'tcp': 0, 'udp': 1, 'icmp': 2}
-        protocol_num = protocol_map.get(protocol, 0)
-        
-        # Extract additional features if available
-        service = packet.get('service', '-')
-        state = packet.get('state', 'REQ')
-        
-        # Build feature vector (mapping to common CICIDS2017 feature order)
-        # Note: This is a generic mapping. Adjust indices based on your specific model.
-        feature_idx = 0
-        
-        # Basic flow features (typically first 10-15 features)
-        if feature_idx < n_features:
-            fv[feature_idx] = duration  # Flow Duration
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = protocol_num  # Protocol
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('service', 0), 0.0)  # Service (encoded)
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('state', 0), 0.0)  # State (encoded)
-            feature_idx += 1
-        
-        # Packet counts
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('spkts', 1.0), 1.0)  # Source packets
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('dpkts', 1.0), 1.0)  # Destination packets
-            feature_idx += 1
-        
-        # Byte counts
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('sbytes', packet_size), packet_size)  # Source bytes
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('dbytes', packet_size), packet_size)  # Destination bytes
-            feature_idx += 1
-        
-        # Rate and timing features
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('rate', 0.0), 0.0)  # Flow rate
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('sttl', 64.0), 64.0)  # Source TTL
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('dttl', 64.0), 64.0)  # Destination TTL
-            feature_idx += 1
-        
-        # Load features
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('sload', 0.0), 0.0)  # Source load
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('dload', 0.0), 0.0)  # Destination load
-            feature_idx += 1
-        
-        # Loss features
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('sloss', 0.0), 0.0)  # Source loss
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('dloss', 0.0), 0.0)  # Destination loss
-            feature_idx += 1
-        
-        # Inter-packet timing
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('sinpkt', 0.0), 0.0)  # Source inter-packet time
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('dinpkt', 0.0), 0.0)  # Destination inter-packet time
-            feature_idx += 1
-        
-        # Jitter
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('sjit', 0.0), 0.0)  # Source jitter
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('djit', 0.0), 0.0)  # Destination jitter
-            feature_idx += 1
-        
-        # Window size
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('swin', 0.0), 0.0)  # Source window size
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('dwin', 0.0), 0.0)  # Destination window size
-            feature_idx += 1
-        
-        # TCP features
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('stcpb', 0.0), 0.0)  # Source TCP base sequence number
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('dtcpb', 0.0), 0.0)  # Destination TCP base sequence number
-            feature_idx += 1
-        
-        # TCP RTT
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('tcprtt', 0.0), 0.0)  # TCP RTT
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('synack', 0.0), 0.0)  # SYN-ACK time
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('ackdat', 0.0), 0.0)  # ACK data time
-            feature_idx += 1
-        
-        # Mean features
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('smean', 0.0), 0.0)  # Source mean
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('dmean', 0.0), 0.0)  # Destination mean
-            feature_idx += 1
-        
-        # Connection features
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('trans_depth', 0.0), 0.0)  # Transaction depth
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('response_body_len', 0.0), 0.0)  # Response body length
-            feature_idx += 1
-        
-        # Connection state features (ct_*)
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('ct_srv_src', 0.0), 0.0)  # Count of connections to same service from source
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('ct_state_ttl', 0.0), 0.0)  # Count of connections with same state and TTL
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('ct_dst_ltm', 0.0), 0.0)  # Count of connections to same destination
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('ct_src_dport_ltm', 0.0), 0.0)  # Count of connections from source to destination port
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('ct_dst_sport_ltm', 0.0), 0.0)  # Count of connections to destination from source port
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('ct_dst_src_ltm', 0.0), 0.0)  # Count of connections to same destination and source
-            feature_idx += 1
-        
-        # FTP and HTTP features
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('is_ftp_login', 0.0), 0.0)  # Is FTP login
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('ct_ftp_cmd', 0.0), 0.0)  # Count of FTP commands
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('ct_flw_http_mthd', 0.0), 0.0)  # Count of HTTP methods in flow
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('ct_src_ltm', 0.0), 0.0)  # Count of connections from source
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('ct_srv_dst', 0.0), 0.0)  # Count of connections to same service to destination
-            feature_idx += 1
-        
-        if feature_idx < n_features:
-            fv[feature_idx] = safe_float(packet.get('is_sm_ips_ports', 0.0), 0.0)  # Is same IP and port
-            feature_idx += 1
-        
-        # Fill remaining features with zeros or derived values
-        while feature_idx < n_features:
-            # Use port numbers, flags, or other available data
-            if feature_idx < n_features and feature_idx % 2 == 0:
-                fv[feature_idx] = float(src_port % 65536) / 65536.0  # Normalized source port
-            elif feature_idx < n_features:
-                fv[feature_idx] = float(dst_port % 65536) / 65536.0  # Normalized destination port
-            feature_idx += 1
-
-        # If scaler present, use it to transform
-        if self.scaler is not None:
+        fv = np.zeros(self._n_features, dtype=np.float32)
+        self._extract_features(packet, fv)
+        return self._scale_features(fv)
+
+    def _extract_features(self, packet: Dict[str, Any], fv: np.ndarray):
+        """Write the unscaled features of one packet into the float32 row fv."""
+        n_features = self._n_features
+
+        src_port = _safe_int(packet.get('src_port', 0))
+        dst_port = _safe_int(packet.get('dst_port', 0))
+        packet_size = _safe_float(packet.get('packet_size', 0.0), 0.0)
+
+        # Table-driven fill of the packet fields, in _FEATURE_SPEC order
+        for i, key, default in self._spec:
+            value = packet.get(key)
+            if default is _PACKET_SIZE:
+                default = packet_size
+            fv[i] = default if value is None else _safe_float(value, default)
+
+        if n_features > _PROTOCOL_IDX:
+            fv[_PROTOCOL_IDX] = _protocol_num(packet.get('protocol', 'tcp'))
+        
+        # Fill remaining features with normalized ports: source port at even
+        # indices, destination port at odd ones
+        fv[self._tail_even] = (src_port % 65536) / 65536.0
+        fv[self._tail_odd] = (dst_port % 65536) / 65536.0
+
+    def _extract_feature_matrix(self, packets: List[Dict[str, Any]]) -> np.ndarray:
+        """Unscaled (N, n_features) float32 features for a batch of packets.
+
+        Same values as _extract_features row by row, but filled column by column:
+        each packet field is gathered across the batch once and stored with a
+        single NumPy assignment, and the port tail is broadcast over all rows.
+        """
+        X = np.zeros((len(packets), self._n_features), dtype=np.float32)
+
+        packet_sizes = [_safe_float(packet.get('packet_size', 0.0), 0.0) for packet in packets]
+        for i, key, default in self._spec:
+            values = [packet.get(key) for packet in packets]
+            if default is _PACKET_SIZE:
+                X[:, i] = [size if value is None else _safe_float(value, size)
+                           for value, size in zip(values, packet_sizes)]
+            else:
+                X[:, i] = [default if value is None else _safe_float(value, default)
+                           for value in values]
+
+        if self._n_features > _PROTOCOL_IDX:
+            X[:, _PROTOCOL_IDX] = [_protocol_num(packet.get('protocol', 'tcp')) for packet in packets]
+
+        src_ports = np.array([_safe_int(packet.get('src_port', 0)) for packet in packets], dtype=np.int64)
+        dst_ports = np.array([_safe_int(packet.get('dst_port', 0)) for packet in packets], dtype=np.int64)
+        X[:, self._tail_even] = ((src_ports % 65536) / 65536.0)[:, None]
+        X[:, self._tail_odd] = ((dst_ports % 65536) / 65536.0)[:, None]
+        return X
+
+    def _scale_features(self, X: np.ndarray) -> np.ndarray:
+        """Standardize one feature vector or an (N, n_features) matrix."""
+        # If scaler present, apply it in place: (x - mean) * (1 / scale)
+        if self._mean is not None:
+            np.subtract(X, self._mean, out=X)
+            np.multiply(X, self._inv_scale, out=X)
+        elif self.scaler is not None:
             try:
-                fv = self.scaler.transform(fv.reshape(1, -1))[0]
+                X = self.scaler.transform(X.reshape(-1, X.shape[-1])).reshape(X.shape)
+                if X.dtype != np.float32:
+                    X = X.astype(np.float32)
             except Exception as e:
                 logger.warning(f"Scaler transform failed: {e}; proceeding without scaling")
 
-        return fv
+        return X
 
     # ---------------------- ML Prediction ----------------------
-    def predict_ml(self, packet: Dict[str, Any]) -> Dict[str, Any]:
+    def predict_ml(self, packet: Dict[str, Any], include_probs: bool = False) -> Dict[str, Any]:
         """Return multi-class prediction and confidence.
 
+        raw_probs is only materialized as a list when include_probs is set;
+        otherwise it is None.
+
         Returns:
             {
                 'ml_available': bool,
                 'pred_class_idx': int,
                 'pred_class': str (if encoder available),
                 'confidence': float,
-                'raw_probs': list
+                'raw_probs': list or None
             }
         """
-        if self.model is None:
+        if self.ort_session is None and self.model is None:
             return {'ml_available': False, 'error': 'Model not loaded'}
 
         try:
-            fv = self.preprocess_packet(packet).astype(np.float32)
-            inp = fv.reshape(1, -1)
-            probs = self.model.predict(inp, verbose=0)
-
-            # handle different output shapes
-            if probs.ndim == 2 and probs.shape[1] > 1:
-                probs = probs[0]
-                idx = int(np.argmax(probs))
-                conf = float(probs[idx])
-            else:
-                # binary single-probability output
-                probs = probs.flatten()
-                if len(probs) == 1:
-                    conf = float(probs[0])
-                    idx = 1 if conf >= 0.5 else 0
+            fv = self.preprocess_packet(packet)  # always float32
+            key = fv.tobytes()
+            with self._pred_cache_lock:
+                probs = self._pred_cache.get(key)
+                if probs is not None:
+                    self._pred_cache.move_to_end(key)
+            if probs is None:
+                if self.ort_session is not None:
+                    probs = self._run_ort(fv)
                 else:
-                    idx = int(np.argmax(probs))
-                    conf = float(probs[idx])
-
-            pred_class = None
-            if self.encoder is not None:
-                try:
-                    pred_class = str(self.encoder.inverse_transform([idx])[0])
-                except Exception:
-                    pred_class = str(idx)
-
-            return {
-                'ml_available': True,
-                'pred_class_idx': idx,
-                'pred_class': pred_class,
-                'confidence': conf,
-                'raw_probs': probs.tolist() if hasattr(probs, 'tolist') else [float(probs)]
-            }
+                    probs = self._predict_keras(fv.reshape(1, -1))
+                # handle different output shapes
+                probs = probs[0] if probs.ndim == 2 else probs.flatten()
+                with self._pred_cache_lock:
+                    self._pred_cache[key] = probs
+                    if len(self._pred_cache) > PREDICTION_CACHE_SIZE:
+                        self._pred_cache.popitem(last=False)
+
+            return self._ml_result(probs, include_probs)
         except Exception as e:
             logger.error(f"ML prediction failed: {e}")
             return {'ml_available': False, 'error': str(e)}
 
+    def _ml_result(self, probs: np.ndarray, include_probs: bool = False) -> Dict[str, Any]:
+        """Build the predict_ml result from one row of model outputs."""
+        if len(probs) == 1:
+            # binary single-probability output
+            conf = float(probs[0])
+            idx = 1 if conf >= 0.5 else 0
+        else:
+            idx = int(np.argmax(probs))
+            conf = float(probs[idx])
+
+        pred_class = None
+        if self.encoder is not None:
+            try:
+                pred_class = str(self.encoder.inverse_transform([idx])[0])
+            except Exception:
+                pred_class = str(idx)
+
+        return {
+            'ml_available': True,
+            'pred_class_idx': idx,
+            'pred_class': pred_class,
+            'confidence': conf,
+            'raw_probs': probs.tolist() if include_probs else None
+        }
+
+    def predict_ml_batch(self, X: np.ndarray) -> np.ndarray:
+        """Run the model once over an (N, n_features) matrix of scaled features."""
+        if self._gpu_session is not None and len(X) >= GPU_MIN_BATCH:
+            session = self._gpu_session
+            return session.run([session.get_outputs()[0].name], {session.get_inputs()[0].name: X})[0]
+        if self.ort_session is not None:
+            return self.ort_session.run([self.out_name], {self.in_name: X})[0]
+        return self._predict_keras(X)
+
+    def _predict_keras(self, X: np.ndarray) -> np.ndarray:
+        if self._infer is not None:
+            return self._infer(tf.constant(X)).numpy()
+        return self.model.predict(X, batch_size=len(X), verbose=0)
+
     # ---------------------- Behavioral detection ----------------------
     def detect_port_scan(self, packet: Dict[str, Any]) -> Dict[str, Any]:
         if self.port_scan_detector is None:
@@ -484,7 +708,7 @@ class CyberSentinelMod:
             return {'heuristic': 'BRUTE_FORCE', 'confidence': min(0.95, total_conns/100), 'severity': 'HIGH'}
 
         # Service scan: many well-known ports touched
-        well_known_hits = sum(1 for p in ip_state['ports'] if p <= 1023)
+        well_known_hits = ip_state['well_known_ports']
         if well_known_hits > 10:
             return {'heuristic': 'SERVICE_SCAN', 'confidence': 0.8, 'severity': 'HIGH'}
 
@@ -493,10 +717,43 @@ class CyberSentinelMod:
     # ---------------------- Unified analysis ----------------------
     def analyze_packet(self, packet: Dict[str, Any], prefer_behavior: bool = True) -> Dict[str, Any]:
         """Run full analysis pipeline and return structured result."""
-        ts = packet.get('timestamp') or datetime.utcnow().isoformat()
+        ts = packet.get('timestamp') or _utc_isoformat()
         packet['timestamp'] = ts
 
-        ml_res = self.predict_ml(packet)
+        return self._combine_results(packet, ts, self.predict_ml(packet, include_probs=False))
+
+    def analyze_packets(self, packets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Analyze many packets with a single model call; returns one result per packet.
+
+        Features for all packets are stacked into one (N, n_features) matrix and
+        scaled and classified together; port scan and heuristic detection then
+        run per packet, in order, exactly as in analyze_packet.
+        """
+        if not packets:
+            return []
+
+        ml_results = None
+        if self.ort_session is not None or self.model is not None:
+            try:
+                X = self._extract_feature_matrix(packets)
+                probs = self.predict_ml_batch(self._scale_features(X))
+                probs = probs.reshape(len(packets), -1)
+                ml_results = [self._ml_result(row) for row in probs]
+            except Exception as e:
+                logger.error(f"Batch ML prediction failed: {e}")
+                ml_results = [{'ml_available': False, 'error': str(e)} for _ in packets]
+        if ml_results is None:
+            ml_results = [{'ml_available': False, 'error': 'Model not loaded'} for _ in packets]
+
+        results = []
+        for packet, ml_res in zip(packets, ml_results):
+            ts = packet.get('timestamp') or _utc_isoformat()
+            packet['timestamp'] = ts
+            results.append(self._combine_results(packet, ts, ml_res))
+        return results
+
+    def _combine_results(self, packet: Dict[str, Any], ts: str, ml_res: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the behavioral detectors and merge them with the ML result."""
         scan_res = self.detect_port_scan(packet)
         heuristic_res = self.heuristic_classify(packet)
 
@@ -527,31 +784,17 @@ class CyberSentinelMod:
             final['attack_label'] = pred
             final['confidence'] = conf
             
-            # Get actual model name from file path (e.g., "CICIDS2017_5class_model")
-            model_name = 'CICIDS2017_5class_model'
-            if self.model_path:
-                # Extract model name from path (e.g., "models/CICIDS2017_5class_model.h5" -> "CICIDS2017_5class_model")
-                import os
-                base_name = os.path.basename(self.model_path)
-                if base_name.endswith('.h5'):
-                    model_name = base_name[:-3]  # Remove .h5 extension
-                else:
-                    model_name = base_name
-            
-            final['model_used'] = model_name
+            final['model_used'] = self._model_name
             
             # Check if it's a threat (not BENIGN/Normal)
-            is_benign = False
-            if pred:
-                pred_upper = str(pred).upper()
-                is_benign = pred_upper in ['BENIGN', 'NORMAL', '0', 'NONE']
+            is_benign, severity = _label_info(str(pred)) if pred else (False, 'LOW')
             
             if not is_benign and conf >= 0.3:  # Lower threshold for ML detection
                 final['threat_detected'] = True
                 final['attack_type'] = pred
                 final['attack_label'] = pred
-                final['severity'] = self._get_severity_from_attack_type(pred)
-                final['recommendation'] = f'{model_name} detected {pred}. Investigate and apply IDS policy based on attack type.'
+                final['severity'] = severity
+                final['recommendation'] = self._recommendation_template.format(pred)
                 return final
             else:
                 # ML says BENIGN, but check other detectors as backup
@@ -601,33 +844,7 @@ class CyberSentinelMod:
         if not attack_type:
             return 'LOW'
         
-        attack_upper = str(attack_type).upper()
-        severity_map = {
-            'BENIGN': 'NONE',
-            'NORMAL': 'NONE',
-            'DOS': 'HIGH',
-            'DDOS': 'HIGH',
-            'PORTSCAN': 'MEDIUM',
-            'PORT_SCAN': 'MEDIUM',
-            'BOT': 'HIGH',
-            'INFILTRATION': 'CRITICAL',
-            'WEBATTACK': 'HIGH',
-            'WEB_ATTACK': 'HIGH',
-            'FTP-PATATOR': 'MEDIUM',
-            'SSH-PATATOR': 'MEDIUM',
-            'BRUTEFORCE': 'HIGH',
-            'BRUTE_FORCE': 'HIGH',
-            'HEARTBLEED': 'CRITICAL',
-            'EXPLOITS': 'HIGH',
-            'BACKDOOR': 'CRITICAL',
-            'SHELLCODE': 'CRITICAL',
-            'WORMS': 'CRITICAL',
-            'ANALYSIS': 'MEDIUM',
-            'FUZZERS': 'MEDIUM',
-            'RECONNAISSANCE': 'MEDIUM',
-            'GENERIC': 'MEDIUM'
-        }
-        return severity_map.get(attack_upper, 'MEDIUM')
+        return _label_info(str(attack_type))[1]
 
     def get_statistics(self, srcip: Optional[str] = None) -> Dict[str, Any]:
         if self.port_scan_detector:
@@ -0,0 +1,94 @@
+"""
+detector_kernel.py - Compiled scoring kernel for AutomaticDetector.analyze_batch
+
+Scores a burst of packets against every enabled attack in one native loop. The
+packet fields arrive as parallel NumPy arrays and the attack rules as per-attack
+tables built by AutomaticDetector, so the loop touches no Python objects.
+
+Numba is optional: without it NUMBA_AVAILABLE is False and AutomaticDetector keeps
+using its NumPy expression path.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Stand-in decorator so the kernel stays importable without Numba"""
+        def decorate(func):
+            return func
+        return decorate
+
+
+# Rule presence bits, matching the MATCH_* bits in attack_categories
+RULE_TCP_FLAGS = 1 << 0
+RULE_CONNECTION_RATE = 1 << 1
+RULE_PROTOCOL = 1 << 2
+RULE_DST_PORT = 1 << 3
+RULE_UNIQUE_PORTS = 1 << 4
+
+
+@njit(cache=True)
+def score_packets(flags, proto_ids, dst_ports, rate_hits,
+                  rule_bits, flag_masks, flag_exact, rule_proto_ids,
+                  port_table, port_counts, weights):
+    """Score every packet against every attack
+
+    Args:
+        flags, proto_ids, dst_ports: int64[N] packet fields (proto_ids is -1 if unknown)
+        rate_hits: bool[A, N] connection-rate results, computed by the caller
+        rule_bits: int64[A] RULE_* bits present in each attack's rules
+        flag_masks, flag_exact: int64[A] / bool[A] compiled "tcp_flags" rules
+        rule_proto_ids: int64[A] IANA protocol number of each "protocol" rule
+        port_table, port_counts: int64[A, K] / int64[A] "dst_port" sets, padded per row
+        weights: int64[5] rule weights in hundredths, in RULE_* bit order
+
+    Returns:
+        (confidence, matched): int64[A, N] scores in hundredths and RULE_* match bits
+    """
+    n_attacks = rule_bits.shape[0]
+    n_packets = flags.shape[0]
+    confidence = np.zeros((n_attacks, n_packets), dtype=np.int64)
+    matched = np.zeros((n_attacks, n_packets), dtype=np.int64)
+
+    for a in range(n_attacks):
+        bits = rule_bits[a]
+        mask = flag_masks[a]
+        for i in range(n_packets):
+            score = 0
+            hits = 0
+            if bits & RULE_TCP_FLAGS:
+                packet_flags = flags[i]
+                if flag_exact[a]:
+                    flag_ok = packet_flags == mask
+                else:
+                    flag_ok = (packet_flags & mask) == mask
+                if flag_ok:
+                    score += weights[0]
+                    hits |= RULE_TCP_FLAGS
+            if bits & RULE_CONNECTION_RATE:
+                if rate_hits[a, i]:
+                    score += weights[1]
+                    hits |= RULE_CONNECTION_RATE
+            if bits & RULE_PROTOCOL:
+                if proto_ids[i] == rule_proto_ids[a]:
+                    score += weights[2]
+                    hits |= RULE_PROTOCOL
+            if bits & RULE_DST_PORT:
+                port = dst_ports[i]
+                for k in range(port_counts[a]):
+                    if port_table[a, k] == port:
+                        score += weights[3]
+                        hits |= RULE_DST_PORT
+                        break
+            if bits & RULE_UNIQUE_PORTS:
+                score += weights[4]
+                hits |= RULE_UNIQUE_PORTS
+            confidence[a, i] = score
+            matched[a, i] = hits
+
+    return confidence, matched
@@ -0,0 +1,54 @@
+"""
+Gunicorn configuration for the Cyber Sentinel web application
+
+Usage:
+    gunicorn -c gunicorn.conf.py app:app
+
+Workers use eventlet so Flask-SocketIO gets native WebSocket support. With
+WEB_WORKERS > 1 the workers share the listening port via SO_REUSEPORT, and
+SOCKETIO_MESSAGE_QUEUE (e.g. redis://localhost:6379/0) must be set so emits
+from one worker reach clients connected to another. Browsers falling back to
+long-polling additionally need a sticky-session load balancer in front.
+"""
+
+import os
+import tempfile
+
+from config import get_config
+
+config = get_config()
+
+bind = f"{config.WEB_HOST}:{config.WEB_PORT}"
+worker_class = 'eventlet'
+workers = int(os.environ.get('WEB_WORKERS', '1'))
+reuse_port = True
+
+# Only one worker may run packet capture and the sample traffic generator
+BACKGROUND_LOCK_PATH = os.environ.get(
+    'CYBER_SENTINEL_BACKGROUND_LOCK',
+    os.path.join(tempfile.gettempdir(), 'cyber_sentinel_background.lock')
+)
+_background_lock = None
+
+
+def post_worker_init(worker):
+    """Start background services in the first worker that takes the lock"""
+    global _background_lock
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+
+    lock_file = open(BACKGROUND_LOCK_PATH, 'w')
+    if fcntl is not None:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            # Another worker already owns the background services
+            lock_file.close()
+            return
+
+    # Held for the worker's lifetime; released by the OS when it exits
+    _background_lock = lock_file
+    from app import start_background_services
+    start_background_services()
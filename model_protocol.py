@@ -0,0 +1,110 @@
+"""
+model_protocol.py
+
+Length-prefixed JSON framing shared by the model server and its clients.
+
+Every message is a 4-byte big-endian body length followed by the UTF-8 JSON body.
+Because bodies are far smaller than 16 MB the first header byte is always 0x00,
+which lets the server tell framed clients apart from legacy clients that send a
+bare JSON object (first byte '{').
+
+Bodies are encoded with orjson when it is installed and the stdlib json otherwise;
+both produce the same wire format.
+"""
+
+import json
+import socket
+import struct
+from typing import Any, Callable, Optional
+
+# Optional fast JSON codec
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+HEADER = struct.Struct('>I')
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+
+def is_framed(first_byte: bytes) -> bool:
+    """Return True if a connection's first byte starts a length-prefixed frame"""
+    return first_byte[:1] == b'\x00'
+
+
+def dumps(payload: Any, default: Optional[Callable] = None) -> bytes:
+    """Serialize payload to UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=default,
+                            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=default).encode('utf-8')
+
+
+def loads(data: bytes) -> Any:
+    """Deserialize UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def encode_message(payload: Any, default: Optional[Callable] = None) -> bytes:
+    """Serialize payload to a single length-prefixed frame"""
+    body = dumps(payload, default=default)
+    return HEADER.pack(len(body)) + body
+
+
+def _fill(sock: socket.socket, view: memoryview):
+    """Read exactly len(view) bytes from sock into view, raising ConnectionError on EOF"""
+    size = len(view)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:], size - received)
+        if not n:
+            raise ConnectionError("Connection closed by peer")
+        received += n
+
+
+def recv_exact(sock: socket.socket, size: int) -> bytearray:
+    """Read exactly size bytes from sock, raising ConnectionError on EOF
+
+    Reads land directly in one preallocated buffer via recv_into, so partial
+    reads need no intermediate chunk objects or final join.
+    """
+    buf = bytearray(size)
+    _fill(sock, memoryview(buf))
+    return buf
+
+
+def send_message(sock: socket.socket, payload: Any, default: Optional[Callable] = None):
+    """Send payload as one length-prefixed frame"""
+    sock.sendall(encode_message(payload, default=default))
+
+
+def send_raw(sock: socket.socket, body: bytes):
+    """Send an already-encoded JSON body as one length-prefixed frame"""
+    sock.sendall(HEADER.pack(len(body)) + body)
+
+
+def recv_message(sock: socket.socket) -> Any:
+    """Receive one length-prefixed frame and decode its JSON body"""
+    (size,) = HEADER.unpack(recv_exact(sock, HEADER.size))
+    if size > MAX_MESSAGE_SIZE:
+        raise ValueError(f"Message too large: {size} bytes")
+    return loads(recv_exact(sock, size))
+
+
+def recv_message_into(sock: socket.socket, buf: bytearray) -> Any:
+    """Like recv_message, but read the body into buf when it fits
+
+    Lets callers exchanging many small messages reuse one buffer instead of
+    allocating one per message. Larger bodies fall back to a fresh buffer.
+    """
+    (size,) = HEADER.unpack(recv_exact(sock, HEADER.size))
+    if size > MAX_MESSAGE_SIZE:
+        raise ValueError(f"Message too large: {size} bytes")
+    if size > len(buf):
+        return loads(recv_exact(sock, size))
+    view = memoryview(buf)[:size]
+    _fill(sock, view)
+    # orjson parses the memoryview in place; the stdlib json needs bytes
+    return loads(view if orjson is not None else bytes(view))
@@ -3,17 +3,24 @@ model_server.py
 
 Socket-based model server that wraps CyberSentinelMod and exposes a simple JSON TCP API.
 
-Protocol (JSON over TCP): client sends a JSON object per request and server replies with JSON.
+Protocol (JSON over TCP): each message is a 4-byte big-endian length prefix followed by a
+JSON body (see model_protocol.py). Clients that send a bare JSON object without a prefix are
+still served with bare JSON replies.
 
 Supported requests:
  - analyze packet: {"srcip":..., "dstip":..., ...}
  - command: {"command": "get_port_scan_stats", "srcip": "1.2.3.4"}
+ - batch: {"command": "batch", "packets": [{...}, ...]} -> {"results": [{...}, ...]}
  - labeled sample: include key "label": e.g. {..packet.., "label": "DoS"}
 
+On hosts with Unix domain sockets the server also listens on DEFAULT_UNIX_SOCKET so
+same-host clients can skip the loopback TCP/IP stack.
+
 Drop this file into your project root and run it separately from Flask app. It will
 load models from the `models/` directory by default.
 """
 
+import os
 import socket
 import threading
 import json
@@ -24,21 +31,29 @@ from typing import Tuple
 import numpy as np
 
 from cyber_sentinel_mod import CyberSentinelMod
+from model_protocol import is_framed, recv_message, send_message
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 DEFAULT_HOST = '0.0.0.0'
 DEFAULT_PORT = 9999
+DEFAULT_UNIX_SOCKET = os.environ.get('MODEL_SERVER_SOCKET', '/tmp/cyber_sentinel.sock')
+
+# Seconds a connection may sit idle before the server closes it. Pooled clients
+# reconnect on their next request, so this only bounds threads held by silent peers.
+IDLE_TIMEOUT = 300
 
 class ModelServer:
     def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
                  model_path: str = 'models/CICIDS2017_5class_model.h5',
                  scaler_path: str = 'models/scaler.pkl',
                  encoder_path: str = 'models/label_encoder.pkl',
-                 retrain_interval: int = 300, retrain_batch: int = 50):
+                 retrain_interval: int = 300, retrain_batch: int = 50,
+                 unix_socket_path: str = DEFAULT_UNIX_SOCKET):
         self.host = host
         self.port = port
+        self.unix_socket_path = unix_socket_path if hasattr(socket, 'AF_UNIX') else None
         self.ids_engine = CyberSentinelMod(model_path=model_path,
                                            scaler_path=scaler_path,
                                            encoder_path=encoder_path)
@@ -58,64 +73,146 @@ class ModelServer:
         logger.info(f"🚀 Starting Model Server on {self.host}:{self.port}")
         server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, 'SO_REUSEPORT'):
+            # Lets several server processes share the port with kernel load balancing
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         server.bind((self.host, self.port))
-        server.listen(8)
+        server.listen(128)
+
+        unix_server = self._start_unix_listener()
 
         try:
-            while not self._stop:
-                client_sock, addr = server.accept()
-                logger.info(f"🔗 Connection from {addr}")
-                t = threading.Thread(target=self._handle_client, args=(client_sock, addr), daemon=True)
-                t.start()
+            self._accept_loop(server)
         except KeyboardInterrupt:
             logger.info("Shutting down server...")
         finally:
             self._stop = True
             server.close()
+            if unix_server:
+                unix_server.close()
+                try:
+                    os.unlink(self.unix_socket_path)
+                except OSError:
+                    pass
+
+    def _start_unix_listener(self):
+        """Listen on the Unix domain socket in a background thread (if supported)"""
+        if not self.unix_socket_path:
+            return None
+        try:
+            if os.path.exists(self.unix_socket_path):
+                os.unlink(self.unix_socket_path)  # stale socket from a previous run
+            unix_server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            unix_server.bind(self.unix_socket_path)
+            unix_server.listen(128)
+        except OSError as e:
+            logger.warning(f"Unix socket {self.unix_socket_path} unavailable, TCP only: {e}")
+            return None
+
+        logger.info(f"🚀 Model Server also listening on {self.unix_socket_path}")
+        threading.Thread(target=self._accept_loop, args=(unix_server,), daemon=True).start()
+        return unix_server
+
+    def _accept_loop(self, server: socket.socket):
+        while not self._stop:
+            try:
+                client_sock, addr = server.accept()
+            except OSError:
+                if self._stop:
+                    break
+                raise
+            logger.info(f"🔗 Connection from {addr or server.getsockname()}")
+            t = threading.Thread(target=self._handle_client, args=(client_sock, addr), daemon=True)
+            t.start()
 
     def _handle_client(self, sock: socket.socket, addr: Tuple[str,int]):
         with sock:
-            data_chunks = []
-            sock.settimeout(10)
-            while True:
+            if sock.family != getattr(socket, 'AF_UNIX', None):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            # Pooled clients open their connections up front and may stay idle
+            # for a while before the first frame, so allow the long idle timeout
+            sock.settimeout(IDLE_TIMEOUT)
+            try:
+                first_byte = sock.recv(1, socket.MSG_PEEK)
+            except OSError:
+                return
+            if is_framed(first_byte):
+                self._serve_framed(sock, addr)
+            else:
+                # Legacy one-shot clients keep the short timeout
+                sock.settimeout(10)
+                self._serve_legacy(sock, addr)
+
+    def _serve_framed(self, sock: socket.socket, addr: Tuple[str,int]):
+        """Serve length-prefixed requests on a persistent (pooled) connection
+
+        The connection is closed once it has been idle for IDLE_TIMEOUT seconds.
+        """
+        while not self._stop:
+            try:
+                payload = recv_message(sock)
+            except socket.timeout:
+                logger.debug(f"Closing connection from {addr} after {IDLE_TIMEOUT}s idle")
+                break
+            except (ConnectionError, OSError):
+                break
+            except Exception as e:
+                logger.error(f"Invalid frame from {addr}: {e}")
+                break
+
+            try:
+                response = self._process_request(payload)
+            except Exception as e:
+                logger.error(f"Error handling client {addr}: {e}")
+                response = {'error': str(e)}
+
+            try:
+                send_message(sock, response, default=self._json_serializer)
+            except (ConnectionError, OSError):
+                break
+
+    def _serve_legacy(self, sock: socket.socket, addr: Tuple[str,int]):
+        """Serve bare JSON requests from clients that don't use framing"""
+        data_chunks = []
+        while True:
+            try:
+                data = sock.recv(64 * 1024)
+                if not data:
+                    break
+                data_chunks.append(data)
+                # try to decode full JSON
                 try:
-                    data = sock.recv(64 * 1024)
-                    if not data:
+                    text = b''.join(data_chunks).decode('utf-8')
+                    payload = json.loads(text)
+                except json.JSONDecodeError:
+                    # wait for more data - but limit buffer size
+                    if len(data_chunks) > 10:  # Prevent memory issues
+                        logger.warning(f"JSON decode failed, buffer too large from {addr}")
                         break
-                    data_chunks.append(data)
-                    # try to decode full JSON
-                    try:
-                        text = b''.join(data_chunks).decode('utf-8')
-                        payload = json.loads(text)
-                    except json.JSONDecodeError:
-                        # wait for more data - but limit buffer size
-                        if len(data_chunks) > 10:  # Prevent memory issues
-                            logger.warning(f"JSON decode failed, buffer too large from {addr}")
-                            break
-                        continue
-
-                    logger.info(f"📨 Received request from {addr}")
-                    # process request
-                    response = self._process_request(payload)
-                    resp_text = json.dumps(response, default=self._json_serializer)
-                    sock.sendall(resp_text.encode('utf-8'))
-
-                    # reset buffer for next request
-                    data_chunks = []
-                except socket.timeout:
-                    logger.warning(f"Socket timeout from {addr}")
-                    break
-                except ConnectionResetError:
-                    logger.warning(f"Connection reset by {addr}")
-                    break
-                except Exception as e:
-                    logger.error(f"Error handling client {addr}: {e}")
-                    try:
-                        error_response = {'error': str(e)}
-                        sock.sendall(json.dumps(error_response, default=self._json_serializer).encode('utf-8'))
-                    except Exception:
-                        pass
-                    break
+                    continue
+
+                logger.info(f"📨 Received request from {addr}")
+                # process request
+                response = self._process_request(payload)
+                resp_text = json.dumps(response, default=self._json_serializer)
+                sock.sendall(resp_text.encode('utf-8'))
+
+                # reset buffer for next request
+                data_chunks = []
+            except socket.timeout:
+                logger.warning(f"Socket timeout from {addr}")
+                break
+            except ConnectionResetError:
+                logger.warning(f"Connection reset by {addr}")
+                break
+            except Exception as e:
+                logger.error(f"Error handling client {addr}: {e}")
+                try:
+                    error_response = {'error': str(e)}
+                    sock.sendall(json.dumps(error_response, default=self._json_serializer).encode('utf-8'))
+                except Exception:
+                    pass
+                break
 
     def _json_serializer(self, obj):
         """Custom JSON serializer for numpy types and other non-serializable objects"""
@@ -138,6 +235,11 @@ class ModelServer:
             if cmd == 'get_port_scan_stats':
                 srcip = payload.get('srcip')
                 return self.ids_engine.get_statistics(srcip)
+            elif cmd == 'batch':
+                packets = payload.get('packets') or []
+                if not isinstance(packets, list):
+                    return {'error': "'packets' must be a list"}
+                return {'results': self._process_batch(packets)}
             elif cmd == 'ping':
                 return {'status': 'ok', 'timestamp': datetime.utcnow().isoformat()}
             else:
@@ -158,6 +260,43 @@ class ModelServer:
             logger.error(f"Processing error: {e}")
             return {'error': str(e)}
 
+    def _process_batch(self, entries: list) -> list:
+        """Handle a batch request; results come back in request order.
+
+        Consecutive plain packets are analyzed together with one model call
+        (analyze_packets). Commands and labeled samples go through
+        _process_request individually, between those runs, so they observe the
+        same detector state as if the batch were handled entry by entry.
+        Entries that are not objects, and nested batch commands, get an error.
+        """
+        results = []
+        run = []
+
+        def flush():
+            if not run:
+                return
+            try:
+                results.extend(self.ids_engine.analyze_packets(run))
+            except Exception as e:
+                logger.error(f"Processing error: {e}")
+                results.extend({'error': str(e)} for _ in run)
+            run.clear()
+
+        for entry in entries:
+            if not isinstance(entry, dict):
+                flush()
+                results.append({'error': 'Batch entries must be objects'})
+            elif entry.get('command') == 'batch':
+                flush()
+                results.append({'error': 'Nested batch commands are not supported'})
+            elif not entry.get('command') and 'label' not in entry:
+                run.append(entry)
+            else:
+                flush()
+                results.append(self._process_request(entry))
+        flush()
+        return results
+
     def _background_retrainer(self):
         """Periodically consumes update_buffer and performs batch retrain if supported."""
         while not self._stop:
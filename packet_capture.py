@@ -9,6 +9,8 @@ import socket
 import json
 import threading
 import logging
+import re
+import time
 from datetime import datetime
 from typing import Optional, Dict, Any
 from collections import defaultdict, deque
@@ -29,6 +31,15 @@ except ImportError as e:
     # Create dummy classes for type hints
     IP = TCP = UDP = ICMP = None
 
+# Interface enumeration is expensive (pcap_findalldevs, registry walks on Windows),
+# so one table is shared across PacketCapture instances for a short time
+INTERFACE_CACHE_TTL = 30.0  # seconds
+_IFACE_TABLE = {'ts': 0.0, 'table': None}
+_iface_table_lock = threading.Lock()
+
+# Matches Wi-Fi adapter names ("Wi-Fi", "WiFi", "Wireless ...") in one case-insensitive scan
+WIFI_NAME_RE = re.compile(r'wi-?fi|wireless', re.IGNORECASE)
+
 class PacketCapture:
     """Capture network packets and forward to detection system"""
     
@@ -75,7 +86,8 @@ class PacketCapture:
             'start_time': None
         }
     
-    def _get_windows_interface_friendly_names(self):
+    @staticmethod
+    def _get_windows_interface_friendly_names():
         """Get Windows interface friendly names mapped to GUIDs"""
         friendly_names = {}
         try:
@@ -139,64 +151,25 @@ class PacketCapture:
         return friendly_names
     
     def _get_available_interfaces(self):
-        """Get list of available network interfaces, prioritizing Wi-Fi"""
-        if not SCAPY_AVAILABLE:
-            return []
-        try:
-            from scapy.arch import get_if_list
-            import platform
-            raw_interfaces = get_if_list()
-            
-            # For Windows, try to get friendly names and prioritize Wi-Fi
-            friendly_names = {}
-            if platform.system() == 'Windows':
-                friendly_names = self._get_windows_interface_friendly_names()
-            
-            # Filter and prioritize interfaces
-            filtered_interfaces = []
-            wifi_interface = None
-            other_interfaces = []
-            
-            for iface in raw_interfaces:
-                # Skip loopback for production monitoring
-                if 'Loopback' in iface or 'loopback' in iface.lower():
-                    continue
-                # Skip empty or invalid interfaces
-                if not iface or len(iface.strip()) < 3:
-                    continue
-                
-                # Check if this is Wi-Fi
-                is_wifi = False
-                iface_lower = iface.lower()
-                # Check friendly name if available
-                if iface in friendly_names:
-                    friendly_name = friendly_names[iface].lower()
-                    if 'wi-fi' in friendly_name or 'wifi' in friendly_name or 'wireless' in friendly_name:
-                        is_wifi = True
-                # Also check GUID/name directly
-                if 'wi-fi' in iface_lower or 'wifi' in iface_lower or 'wireless' in iface_lower:
-                    is_wifi = True
-                
-                if is_wifi:
-                    wifi_interface = iface
-                else:
-                    other_interfaces.append(iface)
-            
-            # Prioritize Wi-Fi, then add others
-            if wifi_interface:
-                filtered_interfaces.append(wifi_interface)
-            filtered_interfaces.extend(other_interfaces)
-            
-            # If no interfaces found, return all (except loopback)
-            if not filtered_interfaces:
-                for iface in raw_interfaces:
-                    if 'Loopback' not in iface and iface and len(iface.strip()) >= 3:
-                        filtered_interfaces.append(iface)
-            
-            return filtered_interfaces
-        except Exception as e:
-            logger.error(f"Error getting interfaces: {e}")
+        """Get list of available network interfaces, prioritizing Wi-Fi (served from the interface table)"""
+        table = get_interface_table()
+        if table is None:
             return []
+        names = table['names']
+        
+        # Skip loopback and empty/invalid names for production monitoring
+        candidates = [
+            i for i, name in enumerate(names)
+            if not table['is_loopback'][i] and len(name.strip()) >= 3
+        ]
+        # Prioritize Wi-Fi, then add others
+        interfaces = [names[i] for i in candidates if table['is_wifi'][i]]
+        interfaces.extend(names[i] for i in candidates if not table['is_wifi'][i])
+        
+        # If no interfaces found, return all (except loopback)
+        if not interfaces:
+            interfaces = [name for name in names if 'Loopback' not in name and len(name.strip()) >= 3]
+        return interfaces
     
     def _rate_limit(self) -> bool:
         """Check if we should process this packet (rate limiting)"""
@@ -227,6 +200,7 @@ class PacketCapture:
                 packet_dict['srcip'] = ip_layer.src
                 packet_dict['dstip'] = ip_layer.dst
                 packet_dict['protocol'] = 'unknown'
+                packet_dict['proto_id'] = ip_layer.proto  # IANA number, matched by AutomaticDetector
                 
                 # Track flow for duration calculation
                 flow_key = (ip_layer.src, ip_layer.dst, ip_layer.proto)
@@ -467,7 +441,7 @@ class PacketCapture:
             from scapy.all import sniff
             import platform
             
-            logger.info(f"🧪 Testing interface {self.interface}...")
+            logger.info("🧪 Testing interface %s...", self.interface)
             
             # On Windows, try friendly name first if it's a GUID
             iface_to_use = self.interface
@@ -480,7 +454,7 @@ class PacketCapture:
                         count=0,
                         store=False
                     )
-                    logger.info(f"✅ Can use 'Wi-Fi' directly as interface name")
+                    logger.info("✅ Can use 'Wi-Fi' directly as interface name")
                     # Store the friendly name for later use
                     self._wifi_name = "Wi-Fi"
                     return (True, False)
@@ -495,11 +469,11 @@ class PacketCapture:
                 store=False
             )
             
-            logger.info(f"✅ Interface {self.interface} is accessible")
+            logger.info("✅ Interface %s is accessible", self.interface)
             return (True, False)  # Success, no fallback needed
             
         except PermissionError:
-            logger.error(f"❌ Permission denied on interface {self.interface}")
+            logger.error("❌ Permission denied on interface %s", self.interface)
             logger.error("💡 Run as Administrator to capture packets")
             return (False, False)
         except (OSError, ValueError) as e:
@@ -507,7 +481,7 @@ class PacketCapture:
             # This often happens with GUID-based interface names
             error_str = str(e)
             if platform.system() == 'Windows' and ('123' in error_str or 'syntax is incorrect' in error_str.lower()):
-                logger.debug(f"⚠️ Interface {self.interface} may need different format (Windows GUID issue)")
+                logger.debug("⚠️ Interface %s may need different format (Windows GUID issue)", self.interface)
                 # Try using None to capture on all interfaces as fallback
                 try:
                     test_result = sniff(
@@ -516,15 +490,15 @@ class PacketCapture:
                         count=0,
                         store=False
                     )
-                    logger.info(f"✅ Can capture on all interfaces (fallback mode)")
+                    logger.info("✅ Can capture on all interfaces (fallback mode)")
                     return (True, True)  # Success, but need fallback
                 except Exception as fallback_error:
-                    logger.debug(f"Fallback test also failed: {fallback_error}")
+                    logger.debug("Fallback test also failed: %s", fallback_error)
                     return (False, False)
-            logger.error(f"❌ Interface {self.interface} not accessible: {e}")
+            logger.error("❌ Interface %s not accessible: %s", self.interface, e)
             return (False, False)
         except Exception as e:
-            logger.error(f"❌ Interface {self.interface} test failed: {e}")
+            logger.error("❌ Interface %s test failed: %s", self.interface, e)
             return (False, False)
     
     def start_capture(self) -> bool:
@@ -610,6 +584,53 @@ class PacketCapture:
         }
 
 
+def _build_interface_table() -> Optional[Dict[str, tuple]]:
+    """Enumerate interfaces once into parallel tuples: names, friendly_names, is_wifi, is_loopback"""
+    if not SCAPY_AVAILABLE:
+        return None
+    try:
+        from scapy.arch import get_if_list
+        import platform
+        names = tuple(iface for iface in get_if_list() if iface)
+        
+        # For Windows, try to get friendly names (used for Wi-Fi detection)
+        friendly = {}
+        if platform.system() == 'Windows':
+            friendly = PacketCapture._get_windows_interface_friendly_names()
+        friendly_names = tuple(friendly.get(name, '') for name in names)
+        
+        return {
+            'names': names,
+            'friendly_names': friendly_names,
+            'is_wifi': tuple(
+                bool(WIFI_NAME_RE.search(name) or WIFI_NAME_RE.search(friendly_name))
+                for name, friendly_name in zip(names, friendly_names)
+            ),
+            'is_loopback': tuple('loopback' in name.lower() for name in names),
+        }
+    except Exception as e:
+        logger.error(f"Error getting interfaces: {e}")
+        return None
+
+
+def get_interface_table(refresh: bool = False) -> Optional[Dict[str, tuple]]:
+    """Return the shared interface table, enumerating at most once per INTERFACE_CACHE_TTL"""
+    with _iface_table_lock:
+        table = _IFACE_TABLE['table']
+        if refresh or table is None or time.monotonic() - _IFACE_TABLE['ts'] >= INTERFACE_CACHE_TTL:
+            table = _build_interface_table()
+            # Don't cache failed enumerations so the next caller retries
+            if table is not None and table['names']:
+                _IFACE_TABLE['table'] = table
+                _IFACE_TABLE['ts'] = time.monotonic()
+        return table
+
+
+def refresh_interface_table() -> Optional[Dict[str, tuple]]:
+    """Re-enumerate interfaces now (e.g. after an adapter is plugged in)"""
+    return get_interface_table(refresh=True)
+
+
 if __name__ == '__main__':
     import time
     
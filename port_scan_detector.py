@@ -30,6 +30,7 @@ class PortScanDetector:
         # Track connection attempts per source IP
         self.ip_tracking = defaultdict(lambda: {
             'ports': set(),
+            'well_known_ports': 0,  # ports <= 1023 in 'ports', kept up to date on insert
             'timestamps': deque(),
             'connection_attempts': deque(),
             'flags': deque(),
@@ -169,7 +170,10 @@ class PortScanDetector:
         
         # Update tracking for this IP
         ip_data = self.ip_tracking[srcip]
-        ip_data['ports'].add(dst_port)
+        if dst_port not in ip_data['ports']:
+            ip_data['ports'].add(dst_port)
+            if dst_port <= 1023:
+                ip_data['well_known_ports'] += 1
         ip_data['timestamps'].append(timestamp)
         ip_data['flags'].append(features['flags'])
         ip_data['protocols'].append(features['protocol'])
@@ -243,7 +247,7 @@ class PortScanDetector:
             details.append(f"UDP port scan: {udp_count} UDP probes")
         
         # Pattern 7: Well-known port scanning
-        well_known_scans = sum(1 for p in ip_data['ports'] if p <= 1023)
+        well_known_scans = ip_data['well_known_ports']
         if well_known_scans > 15:
             severity = 'CRITICAL'  # Upgrade severity
             details.append(f"Targeting {well_known_scans} well-known service ports")
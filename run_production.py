@@ -98,7 +98,7 @@ def main():
     
     # Import and run the main application
     try:
-        from app import app, socketio, config
+        from app import app, socketio, config, get_run_options
         
         # Display configuration
         mode_info = config.get_mode_info()
@@ -122,7 +122,7 @@ def main():
             host=config.WEB_HOST, 
             port=config.WEB_PORT, 
             debug=config.DEBUG_MODE,
-            allow_unsafe_werkzeug=True
+            **get_run_options()
         )
         
     except KeyboardInterrupt:
@@ -34,6 +34,13 @@ function initializeSocket() {
     socket.on('connect', function() {
         console.log('Connected to server');
         isConnected = true;
+        // Subscribe to the live pushes this page renders, declared as
+        // <body data-rooms="..."> ('detections', 'stats'); the server only
+        // sends new_detection / stats_update to those rooms
+        const rooms = (document.body.dataset.rooms || '').split(/\s+/).filter(Boolean);
+        if (rooms.length) {
+            socket.emit('join', {rooms: rooms});
+        }
         updateConnectionStatus(true);
         addActivity('Connected to Cyber Sentinel', 'info');
     });
@@ -55,21 +62,6 @@ function initializeSocket() {
         handleThreatUpdate(data);
     });
     
-    socket.on('new_detection', function(detection) {
-        console.log('New detection via SocketIO:', detection);
-        // Track this detection ID to avoid duplicates
-        const detectionId = `${detection.timestamp}_${detection.source_ip}_${detection.destination_ip}_${detection.attack_type}`;
-        if (!knownDetectionIds.has(detectionId)) {
-            knownDetectionIds.add(detectionId);
-            // Add detection to UI in real-time
-            addThreatDetectionToUI(detection);
-            // Update count
-            updateDetectionCount();
-            // Show notification
-            showToast(`🚨 New threat detected: ${detection.attack_type}`, 'warning', 5000);
-        }
-    });
-    
     socket.on('stats_update', function(data) {
         console.log('Stats update via SocketIO:', data);
         // Update dashboard statistics in real-time
@@ -25,6 +25,9 @@ document.addEventListener('DOMContentLoaded', function() {
             // Update any stats displays on detection page
             updateDetectionPageStats(data);
         });
+        
+        // Port scan simulation runs in the background; its summary arrives here
+        socket.on('port_scan_complete', showPortScanResult);
     }
     
     // Auto-start monitoring if we're on the detection page
@@ -122,34 +125,12 @@ function testPortScan() {
         return response.json();
     })
     .then(result => {
-        console.log('Port scan test result:', result);
+        console.log('Port scan test started:', result);
         
         if (result.success) {
-            addTrafficMessage(`✅ Port scan simulation completed: ${result.packets_sent} packets sent`, 'info');
-            
-            if (result.threats_detected > 0) {
-                addThreatMessage(`🚨 PORT SCAN DETECTED! ${result.threats_detected}/${result.packets_sent} packets identified as threats`, 'threat');
-                
-                // Show final detection result
-                if (result.final_result && result.final_result.threat_detected) {
-                    const fr = result.final_result;
-                    addThreatMessage(
-                        `Attack Type: ${fr.attack_type} | Confidence: ${(fr.confidence * 100).toFixed(1)}% | Severity: ${fr.severity}`,
-                        'threat'
-                    );
-                    
-                    if (fr.scan_details && fr.scan_details.length > 0) {
-                        fr.scan_details.forEach(detail => {
-                            addThreatMessage(`  • ${detail}`, 'info');
-                        });
-                    }
-                }
-            } else {
-                addThreatMessage(`ℹ️ No port scan pattern detected yet (checked ${result.packets_sent} packets)`, 'info');
-            }
+            addTrafficMessage('⏳ Port scan simulation running...', 'info');
         } else {
-            addTrafficMessage(`❌ Port scan test failed: ${result.error || result.message}`, 'error');
-            addThreatMessage(`❌ ${result.error || result.message}`, 'error');
+            showPortScanResult(result);
         }
     })
     .catch(error => {
@@ -159,6 +140,39 @@ function testPortScan() {
     });
 }
 
+// Show the summary of a completed port scan simulation
+function showPortScanResult(result) {
+    console.log('Port scan test result:', result);
+    
+    if (result.success) {
+        addTrafficMessage(`✅ Port scan simulation completed: ${result.packets_sent} packets sent`, 'info');
+        
+        if (result.threats_detected > 0) {
+            addThreatMessage(`🚨 PORT SCAN DETECTED! ${result.threats_detected}/${result.packets_sent} packets identified as threats`, 'threat');
+            
+            // Show final detection result
+            if (result.final_result && result.final_result.threat_detected) {
+                const fr = result.final_result;
+                addThreatMessage(
+                    `Attack Type: ${fr.attack_type} | Confidence: ${(fr.confidence * 100).toFixed(1)}% | Severity: ${fr.severity}`,
+                    'threat'
+                );
+                
+                if (fr.scan_details && fr.scan_details.length > 0) {
+                    fr.scan_details.forEach(detail => {
+                        addThreatMessage(`  • ${detail}`, 'info');
+                    });
+                }
+            }
+        } else {
+            addThreatMessage(`ℹ️ No port scan pattern detected yet (checked ${result.packets_sent} packets)`, 'info');
+        }
+    } else {
+        addTrafficMessage(`❌ Port scan test failed: ${result.error || result.message}`, 'error');
+        addThreatMessage(`❌ ${result.error || result.message}`, 'error');
+    }
+}
+
 // Test general threat detection
 function testThreat() {
     if (!isMonitoring) {